@@ -0,0 +1,195 @@
+import sys
+import numpy as np
+from GridModel import GridModel
+
+try:
+    import scipy.sparse
+    import scipy.sparse.csgraph
+    import scipy.sparse.linalg
+except ImportError:
+    scipy = None
+
+# Without scipy the system is solved densely, which is only feasible for small worlds
+MAX_DENSE_STATES = 4000
+
+class ExactPolicyEvaluator:
+    def __init__(self, world):
+        self.model = GridModel(world)
+        self.optimal_utilities = None
+
+    def build_transition_matrix(self, policy):
+        # Sparse rows of the policy-induced transition matrix as (row, column, probability)
+        # triplets; undefined policies move in every direction with equal chance
+        model = self.model
+        states = np.arange(model.size)
+        rows = []
+        columns = []
+        probabilities = []
+        for a in range(len(model.actions)):
+            action_weight = np.where(policy == a, 1.0, np.where(policy < 0, 1.0 / len(model.actions), 0.0))
+            for k in range(model.outcome_count):
+                weights = action_weight * model.probabilities[model.regions, a, k]
+                used = (weights > 0.0) & model.active
+                rows.append(states[used])
+                columns.append(model.next_states[a, k][used])
+                probabilities.append(weights[used])
+        return np.concatenate(rows), np.concatenate(columns), np.concatenate(probabilities)
+
+    def find_states_reaching_terminals(self, rows, columns):
+        model = self.model
+        if scipy is not None:
+            # Breadth first search on the reversed graph from a virtual node linked to all terminals
+            terminals = np.flatnonzero(model.terminal)
+            graph = scipy.sparse.csr_matrix(
+                (np.ones(columns.size + terminals.size), (np.concatenate([columns, np.full(terminals.size, model.size)]),
+                                                          np.concatenate([rows, terminals]))),
+                shape=(model.size + 1, model.size + 1))
+            reached = np.zeros(model.size + 1, dtype=bool)
+            reached[scipy.sparse.csgraph.breadth_first_order(graph, model.size, directed=True, return_predecessors=False)] = True
+            return reached[:model.size]
+
+        reached = model.terminal.copy()
+        while True:
+            newly_reached = np.zeros(model.size, dtype=bool)
+            newly_reached[rows[reached[columns]]] = True
+            newly_reached &= ~reached
+            if not newly_reached.any():
+                return reached
+            reached |= newly_reached
+
+    def solve(self, policy):
+        # Solves U = R + gamma * P U over active states, terminal utilities are their rewards
+        model = self.model
+        rows, columns, probabilities = self.build_transition_matrix(policy)
+        active_states = np.flatnonzero(model.active)
+        position = np.full(model.size, -1, dtype=np.int64)
+        position[active_states] = np.arange(active_states.size)
+
+        utilities = np.where(model.terminal, model.rewards, 0.0)
+        if active_states.size == 0:
+            return utilities
+
+        if model.gamma >= 1.0 and not self.find_states_reaching_terminals(rows, columns)[active_states].all():
+            print("  Error: Policy never reaches a terminal state from some states, its utilities are unbounded", file=sys.stderr)
+            return None
+
+        into_terminal = model.terminal[columns]
+        right_side = model.rewards[active_states].copy()
+        np.add.at(right_side, position[rows[into_terminal]],
+                  model.gamma * probabilities[into_terminal] * model.rewards[columns[into_terminal]])
+
+        inside = ~into_terminal
+        matrix_rows = position[rows[inside]]
+        matrix_columns = position[columns[inside]]
+        matrix_values = -model.gamma * probabilities[inside]
+
+        if scipy is not None:
+            matrix = scipy.sparse.identity(active_states.size, format='csr') + scipy.sparse.csr_matrix(
+                (matrix_values, (matrix_rows, matrix_columns)), shape=(active_states.size, active_states.size))
+            solution = scipy.sparse.linalg.spsolve(matrix.tocsc(), right_side)
+        else:
+            if active_states.size > MAX_DENSE_STATES:
+                print(f"  Error: Exact evaluation of more than {MAX_DENSE_STATES} states requires scipy", file=sys.stderr)
+                return None
+            matrix = np.identity(active_states.size)
+            np.add.at(matrix, (matrix_rows, matrix_columns), matrix_values)
+            try:
+                solution = np.linalg.solve(matrix, right_side)
+            except np.linalg.LinAlgError:
+                solution = np.full(active_states.size, np.nan)
+
+        if not np.all(np.isfinite(solution)):
+            print("  Error: Policy never reaches a terminal state from some states, its utilities are unbounded", file=sys.stderr)
+            return None
+
+        utilities[active_states] = solution
+        return utilities
+
+    def set_optimal_policy(self, constructed_world):
+        self.optimal_utilities = self.solve(self.model.policy_to_indices(constructed_world))
+        return self.optimal_utilities is not None
+
+    def evaluate(self, constructed_world, start=None):
+        model = self.model
+        utilities = self.solve(model.policy_to_indices(constructed_world))
+        if utilities is None:
+            return None
+
+        report = {'utilities': model.to_grid(utilities)}
+        if start is not None:
+            report['start_utility'] = float(utilities[model.index(*start)])
+
+        if self.optimal_utilities is not None:
+            regrets = np.where(model.active, self.optimal_utilities - utilities, 0.0)
+            active_regrets = regrets[model.active]
+            report['regrets'] = model.to_grid(regrets)
+            report['mean_regret'] = float(active_regrets.mean()) if active_regrets.size else 0.0
+            report['max_regret'] = float(active_regrets.max()) if active_regrets.size else 0.0
+            report['states_with_regret'] = int(np.count_nonzero(active_regrets > 1e-6))
+            report['states'] = int(active_regrets.size)
+            if start is not None:
+                report['start_regret'] = float(regrets[model.index(*start)])
+        return report
+
+    @staticmethod
+    def display_report(report, constructed_world):
+        if 'start_utility' in report:
+            print(f"  Exact evaluation: start state utility {report['start_utility']:.4f}")
+        if 'regrets' not in report:
+            return
+        print(f"  Exact evaluation: regret mean {report['mean_regret']:.4f}, max {report['max_regret']:.4f}, "
+              f"states with regret {report['states_with_regret']}/{report['states']}")
+        if 'start_regret' in report:
+            print(f"  Exact evaluation: start state regret {report['start_regret']:.4f}")
+
+        regrets = report['regrets']
+        width, height = regrets.shape
+        max_chars = max(len(f"{regret:.4f}") for regret in regrets.flat) + 1
+        line = "=" * ((max_chars + 6) * width + 1) + "\n"
+        print("\n  Regret map:")
+        print(line, end="")
+        for j in range(height - 1, -1, -1):
+            print("║", end="")
+            for i in range(width):
+                print(f" {constructed_world[i][j].policy or ' '}", end="")
+                print(f" {constructed_world[i][j].state}", end="")
+                print(f"{regrets[i, j]:>{max_chars}.4f} ║", end="")
+            print("\n", end="")
+            print(line, end="")
+        print("")
+
+def save_policy_file(file_name, constructed_world):
+    # One "X Y action" line per state with a policy, coordinates start at 1
+    with open(file_name, 'w') as outfile:
+        for x, column in enumerate(constructed_world):
+            for y, cell in enumerate(column):
+                if cell.policy.strip():
+                    outfile.write(f"{x + 1} {y + 1} {cell.policy}\n")
+
+def load_policy_file(file_name, constructed_world, actions):
+    try:
+        with open(file_name, 'r') as infile:
+            lines = infile.readlines()
+    except OSError:
+        print(f"  Error: File {file_name} does not exist.", file=sys.stderr)
+        return False
+
+    width = len(constructed_world)
+    height = len(constructed_world[0])
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        try:
+            if len(parts) != 3 or parts[2] not in actions:
+                raise ValueError
+            x, y = int(parts[0]), int(parts[1])
+        except ValueError:
+            print(f"  Error: Invalid policy definition '{line.strip()}' in file {file_name}", file=sys.stderr)
+            return False
+        if x <= 0 or x > width or y <= 0 or y > height:
+            print(f"  Error: Policy state ({x},{y}) is outside world dimensions", file=sys.stderr)
+            return False
+        if constructed_world[x - 1][y - 1].state not in ('T', 'F'):
+            constructed_world[x - 1][y - 1].policy = parts[2]
+    return True
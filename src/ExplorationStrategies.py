@@ -0,0 +1,73 @@
+import math
+import random
+
+# Every strategy has a select_action used by the QLearning inner loop and a
+# set_episode hook that advances its schedule
+
+class Schedule:
+    def __init__(self, kind='constant', start=0.1, end=0.01):
+        self.kind = kind  # One of: constant, linear, exponential
+        self.start = start
+        self.end = end
+
+    def value(self, episode, total_episodes):
+        if self.kind == 'constant' or total_episodes <= 1:
+            return self.start
+        progress = min(episode / (total_episodes - 1), 1.0)
+        if self.kind == 'linear':
+            return self.start + (self.end - self.start) * progress
+        return self.start * (self.end / self.start) ** progress
+
+class EpsilonGreedy:
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.epsilon = schedule.start
+
+    def set_episode(self, episode, total_episodes):
+        self.epsilon = self.schedule.value(episode, total_episodes)
+
+    def select_action(self, actions, q, n, current_policy):
+        if random.random() < self.epsilon or current_policy not in actions:
+            return random.choice(actions)
+        return current_policy
+
+class Softmax:
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.temperature = schedule.start
+
+    def set_episode(self, episode, total_episodes):
+        self.temperature = self.schedule.value(episode, total_episodes)
+
+    def select_action(self, actions, q, n, current_policy):
+        max_q = max(q[action] for action in actions)
+        weights = [math.exp((q[action] - max_q) / self.temperature) for action in actions]
+        return random.choices(actions, weights)[0]
+
+class UCB:
+    def __init__(self, c=1.0):
+        self.c = c  # Weight of the exploration bonus
+
+    def set_episode(self, episode, total_episodes):
+        pass
+
+    def select_action(self, actions, q, n, current_policy):
+        # Actions never tried in the state are taken first
+        untried = [action for action in actions if n.get(action, 0) == 0]
+        if untried:
+            return random.choice(untried)
+        log_visits = math.log(sum(n.get(action, 0) for action in actions))
+        return max(actions, key=lambda action: q[action] + self.c * math.sqrt(log_visits / n[action]))
+
+class LearningRate:
+    def __init__(self, kind='inverse-count', alpha=0.1, omega=0.8):
+        self.kind = kind  # One of: inverse-count, constant, polynomial
+        self.alpha = alpha  # Constant learning rate
+        self.omega = omega  # Exponent of the polynomial rate 1/n^omega
+
+    def rate(self, n):
+        if self.kind == 'constant':
+            return self.alpha
+        if self.kind == 'polynomial':
+            return 1.0 / n ** self.omega
+        return 1.0 / n
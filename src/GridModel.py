@@ -0,0 +1,83 @@
+import numpy as np
+
+class GridModel:
+    def __init__(self, world):
+        constructed_world = world.get_constructed_world()
+        self.width = len(constructed_world)
+        self.height = len(constructed_world[0])
+        self.size = self.width * self.height
+        self.gamma = world.get_gamma()
+
+        kernel = world.get_kernel()
+        self.kernel = kernel
+        self.actions = kernel.actions
+        self.moves = kernel.ring  # Unit moves the kernel is built from
+        self.offsets = kernel.offset_array()  # (actions, outcomes, 2) index offsets
+        self.probabilities = kernel.probability_array()  # (distributions, actions, outcomes)
+        self.outcome_count = self.offsets.shape[1]
+
+        # States are flattened as x * height + y, matching constructed_world[x][y]
+        self.states = np.array([cell.state for column in constructed_world for cell in column])
+        self.rewards = np.array([cell.reward for column in constructed_world for cell in column], dtype=float)
+        self.terminal = self.states == 'T'
+        self.forbidden = self.states == 'F'
+        self.active = ~(self.terminal | self.forbidden)
+
+        self.regions = kernel.region_array(self.width, self.height).ravel()  # Distribution index of each state
+        self.cached_next_states = None
+
+    @property
+    def next_states(self):
+        # Compiled on first use, the table is too large to build for every huge grid
+        if self.cached_next_states is None:
+            self.cached_next_states = self.compile_next_states()
+        return self.cached_next_states
+
+    def compile_next_states(self):
+        # next_states[action, outcome, state] is the flattened index reached when
+        # the agent wants to move in action direction and the slip outcome happens
+        xs, ys = np.divmod(np.arange(self.size), self.height)
+        next_states = np.empty((len(self.actions), self.outcome_count, self.size), dtype=np.int64)
+        for a in range(len(self.actions)):
+            for k, (dx, dy) in enumerate(self.offsets[a]):
+                new_xs = xs + dx
+                new_ys = ys + dy
+                inside = (new_xs >= 0) & (new_xs < self.width) & (new_ys >= 0) & (new_ys < self.height)
+                targets = np.where(inside, new_xs * self.height + new_ys, np.arange(self.size))
+                blocked = ~inside | self.forbidden[targets]
+                next_states[a, k] = np.where(blocked | self.terminal, np.arange(self.size), targets)
+        return next_states
+
+    def compile_outcome_moves(self):
+        # outcome_moves[action, outcome] is the index of the unit move in self.moves
+        return self.kernel.outcome_move_array()
+
+    def compile_blocked_moves(self):
+        # blocked_moves[move, x, y] is True when the unit move leaves the world or hits a forbidden state
+        forbidden = self.to_grid(self.forbidden)
+        blocked_moves = np.ones((len(self.moves), self.width, self.height), dtype=bool)
+        for m, (dx, dy) in enumerate(self.moves):
+            source_x = slice(max(-dx, 0), self.width - max(dx, 0))
+            source_y = slice(max(-dy, 0), self.height - max(dy, 0))
+            target_x = slice(max(dx, 0), self.width - max(-dx, 0))
+            target_y = slice(max(dy, 0), self.height - max(-dy, 0))
+            blocked_moves[m, source_x, source_y] = forbidden[target_x, target_y]
+        return blocked_moves
+
+    def state_probabilities(self, states, actions):
+        # (len(states), outcomes) slip probabilities of the given state-action pairs
+        return self.probabilities[self.regions[states], actions]
+
+    def index(self, x, y):
+        return x * self.height + y
+
+    def policy_to_indices(self, constructed_world):
+        # Undefined policies are encoded as -1
+        lookup = {action: i for i, action in enumerate(self.actions)}
+        return np.array([lookup.get(cell.policy, -1) for column in constructed_world for cell in column], dtype=np.int64)
+
+    def utilities_from_world(self, constructed_world):
+        return np.array([cell.utility for column in constructed_world for cell in column], dtype=float)
+
+    def to_grid(self, values):
+        return np.asarray(values).reshape(self.width, self.height)
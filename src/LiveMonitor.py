@@ -0,0 +1,114 @@
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+def take_newest_snapshot(snapshots, timeout):
+    # Frames that piled up while the renderer was busy are skipped
+    try:
+        snapshot = snapshots.get(timeout=timeout)
+    except queue.Empty:
+        return None
+    while True:
+        try:
+            snapshot = snapshots.get_nowait()
+        except queue.Empty:
+            return snapshot
+
+def run_terminal_renderer(snapshots, stop_event, labels, max_fps):
+    frame_time = 1.0 / max_fps
+    while not stop_event.is_set():
+        frame_start = time.perf_counter()
+        snapshot = take_newest_snapshot(snapshots, frame_time)
+        if snapshot is None:
+            continue
+
+        episode, steps_per_second, max_delta_q, utilities = snapshot
+        states = " ".join(f"{label} {utility:.4f}" for label, utility in zip(labels, utilities))
+        print(f"  Live: episode {episode} | {steps_per_second:.0f} steps/s | max dQ {max_delta_q:.4f} | {states}\r", end='')
+        print("\033[K", end='')  # Clear line
+        sys.stdout.flush()
+
+        time.sleep(max(0.0, frame_time - (time.perf_counter() - frame_start)))
+    print("")
+
+def run_chart_renderer(snapshots, stop_event, labels, max_fps):
+    import matplotlib.pyplot as plt
+
+    frame_time = 1.0 / max_fps
+    episodes = []
+    max_delta_qs = []
+    utilities = [[] for _ in labels]
+
+    plt.ion()
+    figure, (delta_axis, utility_axis) = plt.subplots(2, 1, figsize=(12.8, 7.2))
+    delta_line, = delta_axis.plot([], [], color="#d62728")
+    utility_lines = [utility_axis.plot([], [], label=label)[0] for label in labels]
+    delta_axis.set_title("Q-learning progress")
+    delta_axis.set_ylabel("Max Q value change")
+    delta_axis.set_yscale("log")
+    utility_axis.set_xlabel("Number of episodes")
+    utility_axis.set_ylabel("Utility estimates")
+    if labels:
+        utility_axis.legend(loc="lower right")
+
+    while not stop_event.is_set() and plt.fignum_exists(figure.number):
+        frame_start = time.perf_counter()
+        snapshot = take_newest_snapshot(snapshots, frame_time)
+        if snapshot is not None:
+            episode, steps_per_second, max_delta_q, state_utilities = snapshot
+            episodes.append(episode)
+            max_delta_qs.append(max(max_delta_q, 1e-12))
+            delta_line.set_data(episodes, max_delta_qs)
+            for line, history, utility in zip(utility_lines, utilities, state_utilities):
+                history.append(utility)
+                line.set_data(episodes, history)
+            delta_axis.set_xlabel(f"{steps_per_second:.0f} steps/s")
+            for axis in (delta_axis, utility_axis):
+                axis.relim()
+                axis.autoscale_view()
+        plt.pause(max(0.001, frame_time - (time.perf_counter() - frame_start)))
+    plt.close(figure)
+
+class LiveMonitor:
+    def __init__(self, labels, mode='terminal', max_fps=10, queue_size=64):
+        self.labels = labels  # Names of the monitored states
+        self.mode = mode  # terminal (background thread) or chart (background process)
+        self.max_fps = max_fps
+        self.queue_size = queue_size
+        self.dropped_snapshots = 0
+        self.snapshots = None
+        self.stop_event = None
+        self.renderer = None
+
+    def start(self):
+        if self.mode == 'chart':
+            # Matplotlib has to own the main thread, so the chart lives in its own process
+            self.snapshots = multiprocessing.Queue(maxsize=self.queue_size)
+            self.stop_event = multiprocessing.Event()
+            self.renderer = multiprocessing.Process(
+                target=run_chart_renderer, args=(self.snapshots, self.stop_event, self.labels, self.max_fps), daemon=True)
+        else:
+            self.snapshots = queue.Queue(maxsize=self.queue_size)
+            self.stop_event = threading.Event()
+            self.renderer = threading.Thread(
+                target=run_terminal_renderer, args=(self.snapshots, self.stop_event, self.labels, self.max_fps), daemon=True)
+        self.renderer.start()
+
+    def push(self, episode, steps_per_second, max_delta_q, utilities):
+        # Never blocks the training loop, snapshots are dropped when the queue is full
+        try:
+            self.snapshots.put_nowait((episode, steps_per_second, max_delta_q, utilities))
+            return True
+        except queue.Full:
+            self.dropped_snapshots += 1
+            return False
+
+    def stop(self):
+        # Gives the renderer one more frame to show the final snapshot
+        time.sleep(1.0 / self.max_fps)
+        self.stop_event.set()
+        self.renderer.join()
+        if self.mode == 'chart':
+            self.snapshots.cancel_join_thread()
@@ -0,0 +1,105 @@
+import numpy as np
+
+class MotionKernel:
+    # Unit moves in counterclockwise order starting from up, slips are rotations in this ring
+    rings = {
+        4: [(0, 1), (-1, 0), (0, -1), (1, 0)],
+        8: [(0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (1, 1)]
+    }
+
+    # Action symbols with the ring direction they aim at, the four basic actions come first
+    action_directions = {
+        4: {'^': 0, '<': 1, '>': 3, 'v': 2},
+        8: {'^': 0, '<': 2, '>': 6, 'v': 4, '↖': 1, '↗': 7, '↙': 3, '↘': 5}
+    }
+
+    def __init__(self, connectivity=4):
+        self.connectivity = connectivity
+        self.ring = self.rings[connectivity]
+        self.actions = list(self.action_directions[connectivity])
+
+        # Outcomes are ordered forward, left, right, then further rotations and backwards last
+        self.rotations = [0]
+        for k in range(1, connectivity // 2):
+            self.rotations += [k, connectivity - k]
+        self.rotations.append(connectivity // 2)
+
+        # offsets[a][j] is the move made when action a ends up in outcome j
+        self.offsets = [
+            [self.ring[(self.action_directions[connectivity][action] + rotation) % connectivity] for rotation in self.rotations]
+            for action in self.actions
+        ]
+
+        # distributions[d][a][j] is the slip probability, d = 0 is the world default and
+        # the others come from region overrides
+        self.distributions = []
+        self.region_map = None  # region_map[x][y] is a distribution index, None without regions
+
+        # outcomes[d][action] lists (dx, dy, p) with p > 0, used by the per-state solvers
+        self.outcomes = []
+
+    def distribution_from_p(self, p):
+        # P p1 p2 p3: forward, left and right by 90 degrees, the remainder goes backwards
+        remaining_prob = 1.0 - p[0] - p[1] - p[2]
+        distribution = [0.0] * self.connectivity
+        distribution[self.rotations.index(0)] = p[0]
+        distribution[self.rotations.index(self.connectivity // 4)] = p[1]
+        distribution[self.rotations.index(3 * self.connectivity // 4)] = p[2]
+        distribution[self.rotations.index(self.connectivity // 2)] = 0.0 if remaining_prob < 1e-10 else remaining_prob
+        return distribution
+
+    def distribution_from_rotations(self, rotation_probabilities):
+        # D lines list probabilities for counterclockwise rotations 0, 1, ... ring steps
+        return [rotation_probabilities[rotation] for rotation in self.rotations]
+
+    @classmethod
+    def compile(cls, connectivity, p, action_distributions, regions, width, height):
+        kernel = cls(connectivity)
+
+        # Z regions replace the P triple, actions with their own D distribution keep it everywhere
+        def distributions_for(action_p):
+            return [
+                kernel.distribution_from_rotations(action_distributions[action]) if action in action_distributions
+                else kernel.distribution_from_p(action_p)
+                for action in kernel.actions
+            ]
+
+        kernel.distributions.append(distributions_for(p))
+
+        if regions:
+            kernel.region_map = [[0] * height for _ in range(width)]
+            for x1, y1, x2, y2, region_p in regions:
+                kernel.distributions.append(distributions_for(region_p))
+                for x in range(min(x1, x2) - 1, max(x1, x2)):
+                    for y in range(min(y1, y2) - 1, max(y1, y2)):
+                        kernel.region_map[x][y] = len(kernel.distributions) - 1
+
+        kernel.outcomes = [
+            {action: [(dx, dy, probability) for (dx, dy), probability in zip(kernel.offsets[a], distribution[a]) if probability > 0.0]
+             for a, action in enumerate(kernel.actions)}
+            for distribution in kernel.distributions
+        ]
+        return kernel
+
+    def get_outcomes(self, x, y, action):
+        if self.region_map is None:
+            return self.outcomes[0][action]
+        return self.outcomes[self.region_map[x][y]][action]
+
+    def outcome_move_array(self):
+        # (actions, outcomes) array of indices into the ring of unit moves
+        return np.array([[self.ring.index(offset) for offset in action_offsets] for action_offsets in self.offsets],
+                        dtype=np.int64)
+
+    def offset_array(self):
+        # (actions, outcomes, 2) array of index offsets
+        return np.array(self.offsets, dtype=np.int64)
+
+    def probability_array(self):
+        # (distributions, actions, outcomes) array of slip probabilities
+        return np.array(self.distributions, dtype=float)
+
+    def region_array(self, width, height):
+        if self.region_map is None:
+            return np.zeros((width, height), dtype=np.int64)
+        return np.array(self.region_map, dtype=np.int64)
@@ -0,0 +1,151 @@
+import sys
+import numpy as np
+from TrajectoryLog import read_header, read_transitions
+
+def shuffled_batches(chunks, batch_size, rng, shuffle_buffer_size=262144):
+    # Mixes transitions from consecutive chunks in a bounded buffer and
+    # yields them as shuffled mini-batches
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= shuffle_buffer_size:
+            yield from split_into_batches(np.concatenate(pending), batch_size, rng)
+            pending = []
+            pending_size = 0
+    if pending:
+        yield from split_into_batches(np.concatenate(pending), batch_size, rng)
+
+def split_into_batches(transitions, batch_size, rng):
+    transitions = transitions[rng.permutation(len(transitions))]
+    for begin in range(0, len(transitions), batch_size):
+        yield transitions[begin:begin + batch_size]
+
+class OfflineQLearning:
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.gamma = 0.0
+        self.actions = ['^', '<', '>', 'v']
+        self.passes = 1
+        self.batch_size = 256
+        self.alpha = None  # Constant learning rate, 1/n over the visits of the current pass is used when not set
+        self.rng = np.random.default_rng()
+        self.q = None
+        self.n = None
+        self.pass_n = None  # Visits in the current pass, the 1/n rate restarts every pass
+        self.transitions = 0
+        self.constructed_world = []
+        self.saved_state_utilities = []
+
+    def set_passes(self, new_passes):
+        if new_passes < 1:
+            print("  Error: Number of passes should be at least 1", file=sys.stderr)
+            return False
+        self.passes = new_passes
+        return True
+
+    def set_batch_size(self, new_batch_size):
+        if new_batch_size < 1:
+            print("  Error: Batch size should be at least 1", file=sys.stderr)
+            return False
+        self.batch_size = new_batch_size
+        return True
+
+    def set_alpha(self, new_alpha):
+        if new_alpha is not None and (new_alpha <= 0.0 or new_alpha > 1.0):
+            print("  Error: Learning rate should be in the range (0.0, 1.0]", file=sys.stderr)
+            return False
+        self.alpha = new_alpha
+        return True
+
+    def set_seed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def init_q_table(self):
+        # Starts from the same initial Q values as the online learner
+        self.q = np.array([[cell.q[action] for action in self.actions]
+                           for column in self.constructed_world for cell in column], dtype=float)
+        self.n = np.zeros_like(self.q)
+        self.pass_n = np.zeros_like(self.q)
+
+    def update_from_batch(self, batch):
+        states = batch['x'].astype(np.int64) * self.height + batch['y']
+        new_states = batch['new_x'].astype(np.int64) * self.height + batch['new_y']
+        actions = batch['action'].astype(np.int64)
+
+        next_values = np.where(batch['done'] == 1, batch['next_reward'], self.q[new_states].max(axis=1))
+        deltas = batch['reward'] + self.gamma * next_values - self.q[states, actions]
+
+        # Repeated state-action pairs in a batch are merged into one averaged update
+        pairs, inverse = np.unique(states * len(self.actions) + actions, return_inverse=True)
+        delta_sums = np.bincount(inverse, weights=deltas, minlength=len(pairs))
+        counts = np.bincount(inverse, minlength=len(pairs)).astype(float)
+        pair_states, pair_actions = np.divmod(pairs, len(self.actions))
+
+        self.n[pair_states, pair_actions] += counts
+        self.pass_n[pair_states, pair_actions] += counts
+        if self.alpha is None:
+            # Counting only this pass lets later passes replace the stale bootstrapped
+            # targets of earlier ones instead of averaging with them
+            step = counts / self.pass_n[pair_states, pair_actions]
+        else:
+            step = self.alpha
+        self.q[pair_states, pair_actions] += step * delta_sums / counts
+
+    def save_state_utilities(self):
+        utilities = self.q.max(axis=1).reshape(self.width, self.height)
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.constructed_world[x][y].state in ('T', 'F'):
+                    utility = self.constructed_world[x][y].utility
+                else:
+                    utility = float(utilities[x, y])
+                self.saved_state_utilities[x + y * self.width]['utilities'].append(utility)
+
+    def update_world(self):
+        for x in range(self.width):
+            for y in range(self.height):
+                cell = self.constructed_world[x][y]
+                index = x * self.height + y
+                for i, action in enumerate(self.actions):
+                    cell.q[action] = float(self.q[index, i])
+                    cell.n[action] = int(self.n[index, i])
+                if cell.state not in ('T', 'F'):
+                    best_action = int(self.q[index].argmax())
+                    cell.policy = self.actions[best_action]
+                    cell.utility = float(self.q[index, best_action])
+
+    def start(self, world, file_names):
+        self.gamma = world.get_gamma()
+        self.actions = world.get_kernel().actions
+        self.constructed_world = world.get_constructed_world()
+        self.width = len(self.constructed_world)
+        self.height = len(self.constructed_world[0])
+
+        for file_name in file_names:
+            width, height, actions = read_header(file_name)
+            if (width, height) != (self.width, self.height):
+                print(f"  Error: Trajectory log {file_name} doesn't match world dimensions", file=sys.stderr)
+                return False
+            if actions != len(self.actions):
+                print(f"  Error: Trajectory log {file_name} was written for a world with {actions} actions, this world has {len(self.actions)}", file=sys.stderr)
+                return False
+
+        self.init_q_table()
+        self.saved_state_utilities = [{'x': x, 'y': y, 'utilities': []} for y in range(self.height) for x in range(self.width)]
+        self.save_state_utilities()
+
+        for i in range(self.passes):
+            self.transitions = 0
+            self.pass_n.fill(0.0)
+            for batch in shuffled_batches(read_transitions(file_names), self.batch_size, self.rng):
+                self.update_from_batch(batch)
+                self.transitions += len(batch)
+            self.save_state_utilities()
+            print(f"  Offline QLearning: pass {i + 1}/{self.passes}, {self.transitions} transitions replayed")
+
+        self.update_world()
+        world.update_constructed_world(self.constructed_world)
+        return True
@@ -0,0 +1,194 @@
+import json
+import os
+import sys
+import numpy as np
+from MotionKernel import MotionKernel
+from ValueIterationAlgorithm import ValueIterationAlgorithm
+
+# State codes of the on-disk states grid
+NORMAL_STATE = 0
+TERMINAL_STATE = 1
+FORBIDDEN_STATE = 2
+
+REWARDS_FILE = 'rewards.npy'
+STATES_FILE = 'states.npy'
+UTILITIES_FILE = 'utilities.npy'
+POLICY_FILE = 'policy.npy'
+PROGRESS_FILE = 'progress.json'
+
+def write_grid_arrays(world, directory):
+    # Exports a constructed world to the dense on-disk grids used by the out-of-core solver
+    os.makedirs(directory, exist_ok=True)
+    constructed_world = world.get_constructed_world()
+    codes = {'T': TERMINAL_STATE, 'F': FORBIDDEN_STATE}
+    np.save(os.path.join(directory, REWARDS_FILE),
+            np.array([[cell.reward for cell in column] for column in constructed_world], dtype=float))
+    np.save(os.path.join(directory, STATES_FILE),
+            np.array([[codes.get(cell.state, NORMAL_STATE) for cell in column] for column in constructed_world], dtype=np.uint8))
+
+class OutOfCoreValueIteration(ValueIterationAlgorithm):
+    def __init__(self):
+        super().__init__()
+        self.band_size = 64  # Number of grid rows (x values) updated together
+        self.checkpoint_interval = 16  # Number of bands between progress checkpoints
+        self.directory = ''
+        self.rewards = None
+        self.states = None
+        self.utilities = None
+        self.policy = None
+        self.moves = []
+        self.probabilities = None
+        self.outcome_moves = None
+
+    def set_band_size(self, new_band_size):
+        if new_band_size < 1:
+            print("  Error: Band size should be at least 1", file=sys.stderr)
+            return False
+        self.band_size = new_band_size
+        return True
+
+    def set_checkpoint_interval(self, new_checkpoint_interval):
+        if new_checkpoint_interval < 1:
+            print("  Error: Checkpoint interval should be at least 1", file=sys.stderr)
+            return False
+        self.checkpoint_interval = new_checkpoint_interval
+        return True
+
+    def open_grids(self, resume):
+        self.rewards = np.load(os.path.join(self.directory, REWARDS_FILE), mmap_mode='r')
+        self.states = np.load(os.path.join(self.directory, STATES_FILE), mmap_mode='r')
+        if self.rewards.ndim != 2 or self.rewards.shape != self.states.shape:
+            print("  Error: Reward and state grids should be two dimensional arrays of the same shape", file=sys.stderr)
+            return False
+        self.width, self.height = self.rewards.shape
+
+        utilities_path = os.path.join(self.directory, UTILITIES_FILE)
+        policy_path = os.path.join(self.directory, POLICY_FILE)
+        if resume:
+            self.utilities = np.load(utilities_path, mmap_mode='r+')
+            self.policy = np.load(policy_path, mmap_mode='r+')
+            return True
+
+        self.utilities = np.lib.format.open_memmap(utilities_path, mode='w+', dtype=float, shape=(self.width, self.height))
+        self.policy = np.lib.format.open_memmap(policy_path, mode='w+', dtype=np.int8, shape=(self.width, self.height))
+        for x0 in range(0, self.width, self.band_size):
+            x1 = min(x0 + self.band_size, self.width)
+            terminal = self.states[x0:x1] == TERMINAL_STATE
+            self.utilities[x0:x1] = np.where(terminal, self.rewards[x0:x1], 0.0)
+            self.policy[x0:x1] = -1
+        return True
+
+    def load_progress(self):
+        with open(os.path.join(self.directory, PROGRESS_FILE), 'r') as infile:
+            return json.load(infile)
+
+    def save_progress(self, progress):
+        # Utilities are flushed first, so a checkpoint never points past data that is not on disk
+        self.utilities.flush()
+        self.policy.flush()
+        temporary_path = os.path.join(self.directory, PROGRESS_FILE + '.tmp')
+        with open(temporary_path, 'w') as outfile:
+            json.dump(progress, outfile)
+        os.replace(temporary_path, os.path.join(self.directory, PROGRESS_FILE))
+
+    def update_band(self, x0, x1):
+        # The band is read with a one row halo on both sides, the halo below was
+        # already updated in this sweep, so the sweep is Gauss-Seidel across bands
+        lo = max(x0 - 1, 0)
+        hi = min(x1 + 1, self.width)
+        rows = x1 - x0
+
+        padded_utilities = np.zeros((rows + 2, self.height + 2))
+        padded_blocked = np.ones((rows + 2, self.height + 2), dtype=bool)
+        padded_utilities[lo - x0 + 1:hi - x0 + 1, 1:-1] = self.utilities[lo:hi]
+        padded_blocked[lo - x0 + 1:hi - x0 + 1, 1:-1] = self.states[lo:hi] == FORBIDDEN_STATE
+
+        own = padded_utilities[1:-1, 1:-1]
+        neighbours = []
+        for dx, dy in self.moves:
+            shifted = padded_utilities[1 + dx:rows + 1 + dx, 1 + dy:self.height + 1 + dy]
+            blocked = padded_blocked[1 + dx:rows + 1 + dx, 1 + dy:self.height + 1 + dy]
+            neighbours.append(np.where(blocked, own, shifted))
+
+        action_utilities = np.stack([
+            sum(self.probabilities[a, k] * neighbours[self.outcome_moves[a, k]] for k in range(self.outcome_moves.shape[1]))
+            for a in range(len(self.actions))
+        ])
+
+        active = self.states[x0:x1] == NORMAL_STATE
+        new_utility = np.where(active, self.rewards[x0:x1] + self.gamma * action_utilities.max(axis=0), own)
+        self.utilities[x0:x1] = new_utility
+        self.policy[x0:x1] = np.where(active, action_utilities.argmax(axis=0), -1)
+
+        if not active.any():
+            return float('-inf'), float('inf')
+        utility_delta = (new_utility - own)[active]
+        return float(utility_delta.max()), float(utility_delta.min())
+
+    def set_kernel(self, kernel):
+        self.actions = kernel.actions
+        self.moves = kernel.ring
+        self.probabilities = kernel.probability_array()[0]
+        self.outcome_moves = kernel.outcome_move_array()
+
+    def start(self, directory, gamma, kernel):
+        self.directory = directory
+        self.gamma = gamma
+        self.set_kernel(kernel)
+        if not self.open_grids(False):
+            return False
+
+        # The checkpoint keeps the whole model, so a resumed run solves the same MDP
+        progress = {'sweep': 0, 'next_band': 0, 'max_delta': float('-inf'), 'min_delta': float('inf'),
+                    'converged': False, 'band_size': self.band_size, 'gamma': self.gamma,
+                    'tolerance': self.tolerance, 'connectivity': kernel.connectivity,
+                    'probabilities': self.probabilities.tolist()}
+        self.save_progress(progress)
+        return self.run(progress)
+
+    def resume(self, directory):
+        self.directory = directory
+        if not os.path.exists(os.path.join(directory, PROGRESS_FILE)):
+            print(f"  Error: No checkpoint to resume from in {directory}", file=sys.stderr)
+            return False
+
+        progress = self.load_progress()
+        self.band_size = progress['band_size']
+        self.gamma = progress['gamma']
+        self.tolerance = progress['tolerance']
+        kernel = MotionKernel(progress['connectivity'])
+        self.actions = kernel.actions
+        self.moves = kernel.ring
+        self.probabilities = np.array(progress['probabilities'], dtype=float)
+        self.outcome_moves = kernel.outcome_move_array()
+        if not self.open_grids(True):
+            return False
+        return self.run(progress)
+
+    def run(self, progress):
+        self.sweeps = progress['sweep']
+        band_starts = list(range(0, self.width, self.band_size))
+        while not progress['converged']:
+            for band in range(progress['next_band'], len(band_starts)):
+                x0 = band_starts[band]
+                band_max_delta, band_min_delta = self.update_band(x0, min(x0 + self.band_size, self.width))
+                progress['max_delta'] = max(progress['max_delta'], band_max_delta)
+                progress['min_delta'] = min(progress['min_delta'], band_min_delta)
+                progress['next_band'] = band + 1
+                if (band + 1) % self.checkpoint_interval == 0:
+                    self.save_progress(progress)
+
+            progress['sweep'] += 1
+            self.sweeps = progress['sweep']
+            max_delta, min_delta = progress['max_delta'], progress['min_delta']
+            print(f"  Out-of-core value iteration: sweep {self.sweeps}, max delta {max(abs(max_delta), abs(min_delta)):.6f}")
+
+            progress['converged'] = max_delta == float('-inf') or self.is_converged(max_delta, min_delta)
+            progress.update({'next_band': 0, 'max_delta': float('-inf'), 'min_delta': float('inf')})
+            self.save_progress(progress)
+
+            if not progress['converged'] and self.sweeps >= self.max_sweeps:
+                print(f"  Info: Value iteration stopped after reaching the limit of {self.max_sweeps} sweeps")
+                break
+
+        return True
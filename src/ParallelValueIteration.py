@@ -0,0 +1,137 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from GridModel import GridModel
+from ValueIterationAlgorithm import ValueIterationAlgorithm
+
+class ParallelValueIteration(ValueIterationAlgorithm):
+    def __init__(self):
+        super().__init__()
+        self.tile_size = 256  # Width and height of a tile in states
+        self.workers = os.cpu_count() or 1
+        self.model = None
+        self.tiles = []
+        self.probabilities = None  # (distributions, actions, outcomes) slip probabilities
+        self.regions = None  # Distribution index of every state
+        self.rewards = None
+        self.active = None  # States that are neither terminal nor forbidden
+        self.blocked_moves = None  # (moves, width, height) moves hitting a wall or forbidden state
+        self.outcome_moves = None  # (actions, outcomes) indices into the ring of unit moves
+        self.utilities = None  # Utilities padded with a one state border, read during a sweep
+        self.new_utilities = None  # Utilities written during a sweep
+        self.policy_indices = None
+
+    def set_tile_size(self, new_tile_size):
+        if new_tile_size < 1:
+            print("  Error: Tile size should be at least 1", file=sys.stderr)
+            return False
+        self.tile_size = new_tile_size
+        return True
+
+    def set_workers(self, new_workers):
+        if new_workers < 1:
+            print("  Error: Number of workers should be at least 1", file=sys.stderr)
+            return False
+        self.workers = new_workers
+        return True
+
+    def split_into_tiles(self):
+        self.tiles = [
+            (x0, min(x0 + self.tile_size, self.width), y0, min(y0 + self.tile_size, self.height))
+            for x0 in range(0, self.width, self.tile_size)
+            for y0 in range(0, self.height, self.tile_size)
+        ]
+
+    def update_tile(self, tile):
+        x0, x1, y0, y1 = tile
+
+        # Halo exchange: the tile copies its block together with a one state
+        # border of values written by the neighbouring tiles in the last sweep
+        halo = self.utilities[x0:x1 + 2, y0:y1 + 2].copy()
+        own = halo[1:-1, 1:-1]
+
+        neighbours = []
+        for m, (dx, dy) in enumerate(self.model.moves):
+            shifted = halo[1 + dx:halo.shape[0] - 1 + dx, 1 + dy:halo.shape[1] - 1 + dy]
+            neighbours.append(np.where(self.blocked_moves[m, x0:x1, y0:y1], own, shifted))
+
+        if self.probabilities.shape[0] == 1:
+            probabilities = self.probabilities[0]
+        else:
+            # Region overrides give every state of the tile its own slip distribution
+            probabilities = np.moveaxis(self.probabilities[self.regions[x0:x1, y0:y1]], (2, 3), (0, 1))
+
+        action_utilities = np.stack([
+            sum(probabilities[a, k] * neighbours[self.outcome_moves[a, k]] for k in range(self.model.outcome_count))
+            for a in range(len(self.actions))
+        ])
+
+        active = self.active[x0:x1, y0:y1]
+        new_utility = np.where(active, self.rewards[x0:x1, y0:y1] + self.gamma * action_utilities.max(axis=0), own)
+
+        self.new_utilities[x0 + 1:x1 + 1, y0 + 1:y1 + 1] = new_utility
+        self.policy_indices[x0:x1, y0:y1] = action_utilities.argmax(axis=0)
+
+        if not active.any():
+            return float('-inf'), float('inf')
+        utility_delta = (new_utility - own)[active]
+        return float(utility_delta.max()), float(utility_delta.min())
+
+    def start(self, world):
+        self.p = world.get_p()
+        self.reward = world.get_reward()
+        self.gamma = world.get_gamma()
+        self.constructed_world = world.get_constructed_world()
+
+        self.width = len(self.constructed_world)
+        self.height = len(self.constructed_world[0])
+
+        self.model = GridModel(world)
+        self.actions = self.model.actions
+        self.probabilities = self.model.probabilities
+        self.regions = self.model.to_grid(self.model.regions)
+        self.rewards = self.model.to_grid(self.model.rewards)
+        self.active = self.model.to_grid(self.model.active)
+        self.blocked_moves = self.model.compile_blocked_moves()
+        self.outcome_moves = self.model.compile_outcome_moves()
+
+        self.utilities = np.zeros((self.width + 2, self.height + 2))
+        self.utilities[1:-1, 1:-1] = self.model.to_grid(self.model.utilities_from_world(self.constructed_world))
+        self.new_utilities = self.utilities.copy()
+        self.policy_indices = np.zeros((self.width, self.height), dtype=np.int64)
+        self.split_into_tiles()
+        self.is_synchronous = True
+        self.has_terminals = bool(self.model.terminal.any())
+
+        stop_condition = False
+        self.sweeps = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not stop_condition:
+                tile_deltas = list(executor.map(self.update_tile, self.tiles))
+                self.utilities, self.new_utilities = self.new_utilities, self.utilities
+                self.sweeps += 1
+
+                # Global convergence reduction over all tiles
+                current_max_delta = max(delta[0] for delta in tile_deltas)
+                current_min_delta = min(delta[1] for delta in tile_deltas)
+                if current_max_delta == float('-inf'):
+                    break
+
+                stop_condition = self.is_converged(current_max_delta, current_min_delta)
+                if not stop_condition and self.sweeps >= self.max_sweeps:
+                    print(f"  Info: Value iteration stopped after reaching the limit of {self.max_sweeps} sweeps")
+                    break
+
+        self.write_back_to_world()
+        world.update_constructed_world(self.constructed_world)
+        return True
+
+    def write_back_to_world(self):
+        utilities = self.utilities[1:-1, 1:-1]
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.active[x, y]:
+                    self.update_cell_utility(x, y, float(utilities[x, y]))
+                    self.update_cell_policy(x, y, self.actions[self.policy_indices[x, y]])
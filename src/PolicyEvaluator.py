@@ -0,0 +1,100 @@
+import numpy as np
+from GridModel import GridModel
+
+class PolicyEvaluator:
+    def __init__(self, world, episodes=1000, max_steps=1000, seed=None):
+        self.model = GridModel(world)
+        self.episodes = episodes  # Rollouts per start state
+        self.max_steps = max_steps  # Rollouts longer than this are truncated
+        self.rng = np.random.default_rng(seed)
+        self.optimal_utilities = None
+
+    def set_optimal_utilities(self, constructed_world):
+        self.optimal_utilities = self.model.utilities_from_world(constructed_world)
+
+    def rollout(self, policy, starts):
+        # All episodes advance together, one array operation per time step
+        model = self.model
+        states = np.array(starts, dtype=np.int64)
+        returns = np.zeros(len(states))
+        discounts = np.ones(len(states))
+        lengths = np.zeros(len(states), dtype=np.int64)
+        running = np.flatnonzero(~model.terminal[states])
+        returns[model.terminal[states]] = model.rewards[states[model.terminal[states]]]
+
+        for _ in range(self.max_steps):
+            if running.size == 0:
+                break
+            current = states[running]
+            returns[running] += discounts[running] * model.rewards[current]
+
+            actions = policy[current]
+            undefined = actions < 0
+            actions[undefined] = self.rng.integers(0, len(model.actions), size=np.count_nonzero(undefined))
+
+            cumulative_probabilities = np.cumsum(model.state_probabilities(current, actions), axis=1)
+            draws = self.rng.random(running.size) * cumulative_probabilities[:, -1]
+            outcomes = np.minimum((cumulative_probabilities <= draws[:, None]).sum(axis=1), model.outcome_count - 1)
+            new_states = model.next_states[actions, outcomes, current]
+
+            discounts[running] *= model.gamma
+            lengths[running] += 1
+            states[running] = new_states
+
+            finished = model.terminal[new_states]
+            finished_episodes = running[finished]
+            returns[finished_episodes] += discounts[finished_episodes] * model.rewards[new_states[finished]]
+            running = running[~finished]
+
+        truncated = np.zeros(len(states), dtype=bool)
+        truncated[running] = True
+        return returns, lengths, truncated
+
+    def evaluate(self, constructed_world, start=None, from_all_states=False):
+        model = self.model
+        policy = model.policy_to_indices(constructed_world)
+
+        if from_all_states:
+            start_states = np.flatnonzero(model.active)
+        else:
+            start_states = np.array([model.index(*start)])
+        starts = np.repeat(start_states, self.episodes)
+
+        returns, lengths, truncated = self.rollout(policy, starts)
+
+        mean_return = float(returns.mean())
+        std_return = float(returns.std(ddof=1)) if returns.size > 1 else 0.0
+        half_width = 1.96 * std_return / np.sqrt(returns.size)
+        report = {
+            'episodes': int(returns.size),
+            'mean_return': mean_return,
+            'std_return': std_return,
+            'ci_low': mean_return - half_width,
+            'ci_high': mean_return + half_width,
+            'mean_length': float(lengths.mean()),
+            'median_length': float(np.median(lengths)),
+            'max_length': int(lengths.max()),
+            'truncated': int(np.count_nonzero(truncated))
+        }
+
+        state_returns = returns.reshape(len(start_states), self.episodes).mean(axis=1)
+        if from_all_states:
+            utilities = np.full(model.size, np.nan)
+            utilities[start_states] = state_returns
+            report['state_returns'] = model.to_grid(utilities)
+
+        if self.optimal_utilities is not None:
+            regrets = self.optimal_utilities[start_states] - state_returns
+            report['regret'] = float(regrets.mean())
+            report['max_regret'] = float(regrets.max())
+
+        return report
+
+    @staticmethod
+    def display_report(report, label="Evaluation"):
+        print(f"  {label}: mean return {report['mean_return']:.4f} "
+              f"(95% CI {report['ci_low']:.4f} .. {report['ci_high']:.4f}) over {report['episodes']} episodes")
+        print(f"  {label}: episode length mean {report['mean_length']:.2f}, median {report['median_length']:.1f}, "
+              f"max {report['max_length']}, truncated {report['truncated']}")
+        if 'regret' in report:
+            print(f"  {label}: regret against value iteration mean {report['regret']:.4f}, max {report['max_regret']:.4f}")
@@ -1,4 +1,8 @@
 import random
+import sys
+import time
+from collections import deque
+from ExplorationStrategies import LearningRate
 
 class Cell:
     def __init__(self):
@@ -17,8 +21,27 @@ class QLearning:
         self.epsilon = 0.0
         self.iteration = 0
         self.is_iteration_defined_by_user = False
+        self.mode = 'q-learning'  # One of: q-learning, q-lambda, n-step
+        self.lambda_ = 0.9  # Trace decay used by q-lambda mode
+        self.n_step = 5  # Return length used by n-step mode
+        self.trace_threshold = 1e-4  # Traces below this value are dropped
+        self.evaluator = None  # Optional PolicyEvaluator run at checkpoints
+        self.evaluation_interval = 0
+        self.evaluate_all_states = False  # Checkpoint rollouts start from every state instead of S
+        self.evaluation_reports = []
+        self.monitor = None  # Optional LiveMonitor fed with progress snapshots
+        self.monitored_states = []  # (x, y) states whose utilities are sent to the monitor
+        self.total_steps = 0
+        self.trajectory_logger = None  # Optional TrajectoryLogger receiving every transition
+        self.start_mode = 'start'  # One of: start, uniform, coverage
+        self.start_positions = []  # Non-terminal and non-forbidden states used as exploring starts
+        self.exploration = None  # Exploration strategy, fixed epsilon-greedy when not set
+        self.learning_rate = LearningRate()  # 1/n unless another schedule is set
+        self.max_delta_q = 0.0  # Largest Q value change since the last snapshot
+        self.snapshot_interval = 0.02  # Minimum number of seconds between snapshots
         self.p = []
         self.actions = ['^', '<', '>', 'v']
+        self.kernel = None  # MotionKernel of the world
         self.constructed_world = []
         self.saved_state_utilities = []
 
@@ -34,55 +57,25 @@ class QLearning:
     def is_position_terminal(x, y, constructed_world):
         return constructed_world[x][y].state == "T"
 
-    def update_probability(self, action):
-        if action == '^':
-            return self.p[0]
-        elif action == '<':
-            return self.p[1]
-        elif action == '>':
-            return self.p[2]
-        elif action == 'v':
-            return 1.0 - self.p[0] - self.p[1] - self.p[2]
-        else:
-            return 0
-
     def update_cell_policy(self, x, y, new_policy):
         self.constructed_world[x][y].policy = new_policy
 
     def update_cell_utility(self, x, y, new_utility):
         self.constructed_world[x][y].utility = new_utility
 
+    def update_q(self, x, y, current_action, new_q):
+        delta_q = abs(new_q - self.get_q(x, y, current_action))
+        if delta_q > self.max_delta_q:
+            self.max_delta_q = delta_q
+        self.constructed_world[x][y].q[current_action] = new_q
+
     def update_frequency(self, x, y, current_action):
+        self.total_steps += 1
         if current_action in self.constructed_world[x][y].n:
             self.constructed_world[x][y].n[current_action] += 1
         else:
             self.constructed_world[x][y].n[current_action] = 1
 
-    def update_actions(self, desired_orientation):
-        if desired_orientation == '^':
-            return [(0, 1), (-1, 0), (1, 0), (0, -1)]
-        elif desired_orientation == '<':
-            return [(-1, 0), (0, -1), (0, 1), (1, 0)]
-        elif desired_orientation == '>':
-            return [(1, 0), (0, 1), (0, -1), (-1, 0)]
-        elif desired_orientation == 'v':
-            return [(0, -1), (1, 0), (-1, 0), (0, 1)]
-        else:
-            return [(0, 0), (0, 0), (0, 0), (0, 0)]
-
-    def update_position_changes(self, action, current_orientation):
-        actions = self.update_actions(current_orientation)
-        if action == '^':
-            return actions[0]
-        elif action == '<':
-            return actions[1]
-        elif action == '>':
-            return actions[2]
-        elif action == 'v':
-            return actions[3]
-        else:
-            return (0, 0)
-
     def get_state_reward(self, x, y):
         return self.constructed_world[x][y].reward
 
@@ -121,10 +114,8 @@ class QLearning:
 
     def calculate_new_positions_possibilities_for_all_actions(self, x, y, action):
         points = []
-        for action_i in self.actions:
-            dx, dy = self.update_position_changes(action_i, action)
+        for dx, dy, p_current in self.kernel.get_outcomes(x, y, action):
             new_x, new_y = self.calculate_new_position(x, y, dx, dy)
-            p_current = self.update_probability(action_i)
 
             point = {'x': new_x, 'y': new_y, 'p': p_current}
             if self.is_position_out_of_the_world(new_x, new_y, self.width, self.height) or \
@@ -137,10 +128,16 @@ class QLearning:
 
     def generate_random_action(self, current_policy):
         if random.random() < self.epsilon or current_policy == ' ':
-            return random.choice(['^', '<', '>', 'v'])
+            return random.choice(self.actions)
         else:
             return current_policy
 
+    def select_action(self, x, y, current_policy):
+        if self.exploration is None:
+            return self.generate_random_action(current_policy)
+        cell = self.constructed_world[x][y]
+        return self.exploration.select_action(self.actions, cell.q, cell.n, current_policy)
+
     def execute_agent_move(self, x, y, possible_moves):
         total_prob = sum([move['p'] for move in possible_moves])
         rand_val = random.uniform(0, total_prob)
@@ -172,11 +169,157 @@ class QLearning:
         index = x + y * self.width
         self.saved_state_utilities[index]['utilities'].append(self.constructed_world[x][y].utility)
 
+    def get_bootstrap_value(self, x, y):
+        if self.is_position_terminal(x, y, self.constructed_world):
+            return self.get_state_reward(x, y)
+        return self.get_best_policy_and_max_q(x, y)[1]
+
+    def refresh_cell(self, x, y):
+        best_policy, max_q = self.get_best_policy_and_max_q(x, y)
+        self.update_cell_policy(x, y, best_policy)
+        self.update_cell_utility(x, y, max_q)
+
+    def take_step(self, x, y, action):
+        possible_moves = self.calculate_new_positions_possibilities_for_all_actions(x, y, action)
+        new_x, new_y = self.execute_agent_move(x, y, possible_moves)
+        if self.trajectory_logger is not None:
+            self.trajectory_logger.log(x, y, self.actions.index(action), self.get_state_reward(x, y), new_x, new_y,
+                                       self.is_position_terminal(new_x, new_y, self.constructed_world),
+                                       self.get_state_reward(new_x, new_y))
+        return new_x, new_y
+
+    def get_visit_count(self, x, y):
+        return sum(self.constructed_world[x][y].n.values())
+
+    def choose_start_position(self, start_x, start_y):
+        if self.start_mode == 'uniform' and self.start_positions:
+            return random.choice(self.start_positions)
+        if self.start_mode == 'coverage' and self.start_positions:
+            # Rarely visited states are picked more often, so their Q values catch up
+            weights = [1.0 / (1.0 + self.get_visit_count(x, y)) for x, y in self.start_positions]
+            return random.choices(self.start_positions, weights)[0]
+        return start_x, start_y
+
+    def run_q_learning_episode(self, x, y):
+        current_x = x
+        current_y = y
+        while True:
+            if self.is_position_terminal(current_x, current_y, self.constructed_world):
+                break
+
+            current_action = self.select_action(current_x, current_y, self.constructed_world[current_x][current_y].policy)
+            new_x, new_y = self.take_step(current_x, current_y, current_action)
+
+            self.update_frequency(current_x, current_y, current_action)
+
+            alpha = self.learning_rate.rate(self.get_frequency_of_action(current_x, current_y, current_action))
+            old_q = self.get_q(current_x, current_y, current_action)
+
+            new_best_policy, new_max_q = self.get_best_policy_and_max_q(new_x, new_y)
+
+            if self.is_position_terminal(new_x, new_y, self.constructed_world):
+                new_max_q = self.get_state_reward(new_x, new_y)
+
+            new_q = self.get_state_reward(current_x, current_y) + self.gamma * new_max_q
+            self.update_q(current_x, current_y, current_action, old_q + alpha * (new_q - old_q))
+            if not self.is_position_terminal(new_x, new_y, self.constructed_world):
+                self.update_cell_policy(new_x, new_y, new_best_policy)
+
+            current_best_policy, current_max_q = self.get_best_policy_and_max_q(current_x, current_y)
+
+            self.update_cell_utility(current_x, current_y, current_max_q)
+            current_x = new_x
+            current_y = new_y
+
+    def run_q_lambda_episode(self, x, y):
+        # Watkins Q(lambda): traces are kept in a dict keyed by (x, y, action),
+        # so each step only touches state-action pairs visited in this episode
+        traces = {}
+        current_x = x
+        current_y = y
+        if self.is_position_terminal(current_x, current_y, self.constructed_world):
+            return
+        current_action = self.select_action(current_x, current_y, self.constructed_world[current_x][current_y].policy)
+
+        while True:
+            new_x, new_y = self.take_step(current_x, current_y, current_action)
+            self.update_frequency(current_x, current_y, current_action)
+
+            is_new_terminal = self.is_position_terminal(new_x, new_y, self.constructed_world)
+            old_q = self.get_q(current_x, current_y, current_action)
+            delta = self.get_state_reward(current_x, current_y) + self.gamma * self.get_bootstrap_value(new_x, new_y) - old_q
+
+            # Replacing traces keep the step size bounded by alpha on revisits
+            traces[(current_x, current_y, current_action)] = 1.0
+
+            touched_cells = set()
+            for (tx, ty, ta), trace in traces.items():
+                alpha = self.learning_rate.rate(self.get_frequency_of_action(tx, ty, ta))
+                self.update_q(tx, ty, ta, self.get_q(tx, ty, ta) + alpha * delta * trace)
+                touched_cells.add((tx, ty))
+            for tx, ty in touched_cells:
+                self.refresh_cell(tx, ty)
+
+            if is_new_terminal:
+                break
+
+            greedy_action, _ = self.get_best_policy_and_max_q(new_x, new_y)
+            self.update_cell_policy(new_x, new_y, greedy_action)
+            next_action = self.select_action(new_x, new_y, greedy_action)
+
+            # Traces are cut as soon as an exploratory action is taken
+            if next_action != greedy_action or self.lambda_ == 0.0:
+                traces.clear()
+            else:
+                decay = self.gamma * self.lambda_
+                traces = {key: trace * decay for key, trace in traces.items() if trace * decay >= self.trace_threshold}
+
+            current_x, current_y, current_action = new_x, new_y, next_action
+
+    def run_n_step_episode(self, x, y):
+        # Sliding window of the last n (x, y, action, reward) transitions
+        window = deque()
+        current_x = x
+        current_y = y
+
+        while not self.is_position_terminal(current_x, current_y, self.constructed_world):
+            current_action = self.select_action(current_x, current_y, self.constructed_world[current_x][current_y].policy)
+            new_x, new_y = self.take_step(current_x, current_y, current_action)
+            self.update_frequency(current_x, current_y, current_action)
+
+            window.append((current_x, current_y, current_action, self.get_state_reward(current_x, current_y)))
+            if len(window) == self.n_step:
+                self.update_n_step_q(window, new_x, new_y)
+                window.popleft()
+
+            if not self.is_position_terminal(new_x, new_y, self.constructed_world):
+                new_best_policy, _ = self.get_best_policy_and_max_q(new_x, new_y)
+                self.update_cell_policy(new_x, new_y, new_best_policy)
+
+            current_x, current_y = new_x, new_y
+
+        while window:
+            self.update_n_step_q(window, current_x, current_y)
+            window.popleft()
+
+    def update_n_step_q(self, window, last_x, last_y):
+        n_step_return = self.get_bootstrap_value(last_x, last_y)
+        for _, _, _, reward in reversed(window):
+            n_step_return = reward + self.gamma * n_step_return
+
+        x, y, action, _ = window[0]
+        alpha = self.learning_rate.rate(self.get_frequency_of_action(x, y, action))
+        old_q = self.get_q(x, y, action)
+        self.update_q(x, y, action, old_q + alpha * (n_step_return - old_q))
+        self.refresh_cell(x, y)
+
     def start(self, world):
         self.p = world.get_p()
         self.reward = world.get_reward()
         self.gamma = world.get_gamma()
         self.epsilon = world.get_epsilon()
+        self.kernel = world.get_kernel()
+        self.actions = self.kernel.actions
         self.constructed_world = world.get_constructed_world()
 
         self.width = len(self.constructed_world)
@@ -187,46 +330,103 @@ class QLearning:
 
         self.init_saved_state_utilities()
 
-        for i in range(self.iteration):
-            self.display_progress_bar(i + 1, self.iteration)
-            x, y = world.get_coordinates_of_state("S")
-            current_x = x
-            current_y = y
-            while True:
-                if self.is_position_terminal(current_x, current_y, self.constructed_world):
-                    break
-
-                current_action = self.generate_random_action(self.constructed_world[current_x][current_y].policy)
-                possible_moves = self.calculate_new_positions_possibilities_for_all_actions(current_x, current_y, current_action)
-                new_x, new_y = self.execute_agent_move(current_x, current_y, possible_moves)
-
-                self.update_frequency(current_x, current_y, current_action)
-
-                alpha = 1.0 / self.get_frequency_of_action(current_x, current_y, current_action)
-                old_q = self.get_q(current_x, current_y, current_action)
-
-                new_best_policy, new_max_q = self.get_best_policy_and_max_q(new_x, new_y)
-
-                if self.is_position_terminal(new_x, new_y, self.constructed_world):
-                    new_max_q = self.get_state_reward(new_x, new_y)
+        start_x, start_y = world.get_coordinates_of_state("S")
+        self.start_positions = [
+            (x, y) for x in range(self.width) for y in range(self.height)
+            if not self.is_position_terminal(x, y, self.constructed_world) and
+            not self.is_position_forbidden(x, y, self.constructed_world)
+        ]
 
-                new_q = self.get_state_reward(current_x, current_y) + self.gamma * new_max_q
-                self.constructed_world[current_x][current_y].q[current_action] = old_q + alpha * (new_q - old_q)
-                if not self.is_position_terminal(new_x, new_y, self.constructed_world):
-                    self.update_cell_policy(new_x, new_y, new_best_policy)
+        last_snapshot_time = time.perf_counter()
+        last_snapshot_steps = self.total_steps
 
-                current_best_policy, current_max_q = self.get_best_policy_and_max_q(current_x, current_y)
-
-                self.update_cell_utility(current_x, current_y, current_max_q)
-                current_x = new_x
-                current_y = new_y
+        for i in range(self.iteration):
+            if self.monitor is None:
+                self.display_progress_bar(i + 1, self.iteration)
+            x, y = self.choose_start_position(start_x, start_y)
+            if self.exploration is not None:
+                self.exploration.set_episode(i, self.iteration)
+
+            if self.mode == 'q-lambda':
+                self.run_q_lambda_episode(x, y)
+            elif self.mode == 'n-step':
+                self.run_n_step_episode(x, y)
+            else:
+                self.run_q_learning_episode(x, y)
 
             for yy in range(self.height):
                 for xx in range(self.width):
                     self.save_state_utility(xx, yy)
 
+            if self.monitor is not None:
+                current_time = time.perf_counter()
+                if current_time - last_snapshot_time >= self.snapshot_interval or i + 1 == self.iteration:
+                    steps_per_second = (self.total_steps - last_snapshot_steps) / (current_time - last_snapshot_time)
+                    utilities = tuple(self.constructed_world[sx][sy].utility for sx, sy in self.monitored_states)
+                    self.monitor.push(i + 1, steps_per_second, self.max_delta_q, utilities)
+                    last_snapshot_time = current_time
+                    last_snapshot_steps = self.total_steps
+                    self.max_delta_q = 0.0
+
+            if self.evaluator is not None and (i + 1) % self.evaluation_interval == 0:
+                report = self.evaluator.evaluate(self.constructed_world, (start_x, start_y), self.evaluate_all_states)
+                self.evaluation_reports.append((i + 1, report))
+
+        if self.trajectory_logger is not None:
+            self.trajectory_logger.flush()
+
         print("\n\n")
         world.update_constructed_world(self.constructed_world)
 
     def set_iteration(self, new_iteration):
         self.iteration = new_iteration
+
+    def set_mode(self, new_mode):
+        if new_mode not in ('q-learning', 'q-lambda', 'n-step'):
+            print(f"  Error: Unknown learning mode {new_mode}", file=sys.stderr)
+            return False
+        self.mode = new_mode
+        return True
+
+    def set_lambda(self, new_lambda):
+        if new_lambda < 0.0 or new_lambda > 1.0:
+            print("  Error: Lambda should be in the range [0.0, 1.0]", file=sys.stderr)
+            return False
+        self.lambda_ = new_lambda
+        return True
+
+    def set_n_step(self, new_n_step):
+        if new_n_step < 1:
+            print("  Error: Number of steps should be at least 1", file=sys.stderr)
+            return False
+        self.n_step = new_n_step
+        return True
+
+    def set_evaluator(self, evaluator, interval, from_all_states=False):
+        if interval < 1:
+            print("  Error: Evaluation interval should be at least 1", file=sys.stderr)
+            return False
+        self.evaluator = evaluator
+        self.evaluation_interval = interval
+        self.evaluate_all_states = from_all_states
+        return True
+
+    def set_monitor(self, monitor, monitored_states):
+        self.monitor = monitor
+        self.monitored_states = monitored_states
+
+    def set_trajectory_logger(self, trajectory_logger):
+        self.trajectory_logger = trajectory_logger
+
+    def set_start_mode(self, new_start_mode):
+        if new_start_mode not in ('start', 'uniform', 'coverage'):
+            print(f"  Error: Unknown episode start mode {new_start_mode}", file=sys.stderr)
+            return False
+        self.start_mode = new_start_mode
+        return True
+
+    def set_exploration(self, exploration):
+        self.exploration = exploration
+
+    def set_learning_rate(self, learning_rate):
+        self.learning_rate = learning_rate
@@ -0,0 +1,73 @@
+import os
+import numpy as np
+
+MAGIC = b"QTRAJ002"
+
+# One record per transition. next_reward is only used when the next state is terminal
+TRANSITION_DTYPE = np.dtype([
+    ('x', '<i4'),
+    ('y', '<i4'),
+    ('action', 'u1'),
+    ('done', 'u1'),
+    ('reward', '<f8'),
+    ('new_x', '<i4'),
+    ('new_y', '<i4'),
+    ('next_reward', '<f8')
+])
+
+# The action count ties the action indices of the records to the motion kernel of the world
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('width', '<i4'), ('height', '<i4'), ('actions', '<i4')])
+
+class TrajectoryLogger:
+    def __init__(self, file_name, width, height, actions, batch_size=4096):
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.buffer = np.zeros(batch_size, dtype=TRANSITION_DTYPE)
+        self.buffered = 0
+        self.logged = 0
+
+        # Logs are append-only, a header is written only for a new file
+        if os.path.exists(file_name) and os.path.getsize(file_name) > 0:
+            header_width, header_height, header_actions = read_header(file_name)
+            if (header_width, header_height) != (width, height):
+                raise ValueError(f"Trajectory log {file_name} was written for a {header_width}x{header_height} world")
+            if header_actions != actions:
+                raise ValueError(f"Trajectory log {file_name} was written for a world with {header_actions} actions")
+        else:
+            np.array([(MAGIC, width, height, actions)], dtype=HEADER_DTYPE).tofile(file_name)
+        self.file = open(file_name, 'ab')
+
+    def log(self, x, y, action, reward, new_x, new_y, done, next_reward):
+        self.buffer[self.buffered] = (x, y, action, done, reward, new_x, new_y, next_reward)
+        self.buffered += 1
+        if self.buffered == self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffered:
+            self.buffer[:self.buffered].tofile(self.file)
+            self.file.flush()
+            self.logged += self.buffered
+            self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def read_header(file_name):
+    header = np.fromfile(file_name, dtype=HEADER_DTYPE, count=1)
+    if header.size != 1 or header['magic'][0] != MAGIC:
+        raise ValueError(f"File {file_name} isn't a trajectory log")
+    return int(header['width'][0]), int(header['height'][0]), int(header['actions'][0])
+
+def read_transitions(file_names, chunk_size=65536):
+    # Streams the logs chunk by chunk through a memory map, never loading a whole file
+    for file_name in file_names:
+        read_header(file_name)
+        count = (os.path.getsize(file_name) - HEADER_DTYPE.itemsize) // TRANSITION_DTYPE.itemsize
+        if count == 0:
+            continue
+        transitions = np.memmap(file_name, dtype=TRANSITION_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize, shape=(count,))
+        for begin in range(0, len(transitions), chunk_size):
+            yield np.array(transitions[begin:begin + chunk_size])
+        del transitions
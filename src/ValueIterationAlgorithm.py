@@ -1,3 +1,5 @@
+import sys
+
 class World:
     def __init__(self):
         self.p = []
@@ -37,6 +39,16 @@ class ValueIterationAlgorithm:
         self.width = 0
         self.height = 0
         self.actions = ['^', '<', '>', 'v']
+        self.kernel = None  # MotionKernel of the world
+        self.tolerance = 0.0001  # Allowed policy loss epsilon
+        self.max_sweeps = 100000  # Upper bound on the number of sweeps
+        self.is_relative = False  # Relative value iteration, only for gamma = 1
+        self.sweeps = 0
+        self.gain = 0.0  # Average reward per step found by relative value iteration
+        self.sink_utility = 0.0  # Utility of the absorbing state behind terminals
+        self.previous_utilities = []  # Utilities from the last sweep, used by synchronous sweeps
+        self.is_synchronous = False  # Whether a sweep only reads utilities of the previous sweep
+        self.has_terminals = False
 
     @staticmethod
     def is_position_out_of_the_world(x, y, width, height):
@@ -58,40 +70,6 @@ class ValueIterationAlgorithm:
     def calculate_new_position(x, y, dx, dy):
         return x + dx, y + dy
 
-    def update_probability(self, action):
-        if action == '^':
-            return self.p[0]
-        elif action == '<':
-            return self.p[1]
-        elif action == '>':
-            return self.p[2]
-        elif action == 'v':
-            remaining_prob = 1.0 - sum(self.p)
-            return 0 if remaining_prob < 1e-10 else remaining_prob
-        else:
-            return 0
-
-
-    def update_actions(self, desired_orientation):
-        if desired_orientation == '^':
-            return [(0, 1), (-1, 0), (1, 0), (0, -1)]
-        elif desired_orientation == '<':
-            return [(-1, 0), (0, -1), (0, 1), (1, 0)]
-        elif desired_orientation == '>':
-            return [(1, 0), (0, 1), (0, -1), (-1, 0)]
-        elif desired_orientation == 'v':
-            return [(0, -1), (1, 0), (-1, 0), (0, 1)]
-        else:
-            return [(0, 0), (0, 0), (0, 0), (0, 0)]
-
-    def update_position_changes(self, action, current_orientation):
-        actions = self.update_actions(current_orientation)
-        
-        # Mapping action string to corresponding index
-        action_index = self.actions.index(action)
-        
-        return actions[action_index]
-
     def calculate_new_utility(self, action_utilities, x, y):
         return self.constructed_world[x][y].reward + self.gamma * max(action_utilities)
 
@@ -116,24 +94,28 @@ class ValueIterationAlgorithm:
         index = y * self.width + x
         self.saved_state_utilities[index]["utilities"].append(self.constructed_world[x][y].utility)
 
+    def get_previous_utility(self, x, y):
+        if self.previous_utilities:
+            return self.previous_utilities[x][y]
+        return self.constructed_world[x][y].utility
+
     def calculate_utilities_for_all_actions(self, x, y, action, action_utilities):
         utility = 0.0
-        for action_i in self.actions:
-            dx, dy = self.update_position_changes(action_i, action)
+        for dx, dy, p_current in self.kernel.get_outcomes(x, y, action):
             new_x, new_y = self.calculate_new_position(x, y, dx, dy)
-            p_current = self.update_probability(action_i)
             if self.is_position_out_of_the_world(new_x, new_y, self.width, self.height) or \
                self.is_position_forbidden(new_x, new_y, self.constructed_world):
-                utility += p_current * self.constructed_world[x][y].utility
+                utility += p_current * self.get_previous_utility(x, y)
             else:
-                utility += p_current * self.constructed_world[new_x][new_y].utility
+                utility += p_current * self.get_previous_utility(new_x, new_y)
         action_utilities.append(utility)
 
-
     def start(self, world):
         self.p = world.get_p()
         self.reward = world.get_reward()
         self.gamma = world.get_gamma()
+        self.kernel = world.get_kernel()
+        self.actions = self.kernel.actions
         self.constructed_world = world.get_constructed_world()
 
         self.width = len(self.constructed_world)
@@ -143,10 +125,24 @@ class ValueIterationAlgorithm:
 
         action_utilities = []
         stop_condition = False
-        max_delta = float('inf')
+        self.sweeps = 0
+        self.gain = 0.0
+        self.sink_utility = 0.0
+        self.is_synchronous = self.is_relative
+        self.has_terminals = any(cell.state == 'T' for column in self.constructed_world for cell in column)
+        reference_x, reference_y = self.get_reference_position()
+
+        if self.is_relative and not self.is_communicating(reference_x, reference_y):
+            print("  Error: Relative value iteration requires every non-terminal state to be reachable from every other one", file=sys.stderr)
+            return False
 
         while not stop_condition:
-            current_max_delta = 0.0
+            if self.is_relative:
+                # Relative value iteration uses synchronous sweeps so that the
+                # shift of the reference state is an estimate of the gain
+                self.previous_utilities = [[cell.utility for cell in column] for column in self.constructed_world]
+            current_max_delta = float('-inf')
+            current_min_delta = float('inf')
             for y in range(self.height):
                 for x in range(self.width):
                     if self.is_position_terminal(x, y, self.constructed_world) or \
@@ -162,14 +158,149 @@ class ValueIterationAlgorithm:
 
                     action_utilities.clear()
 
-                    utility_delta = abs(new_utility - self.constructed_world[x][y].utility)
-                    if utility_delta > current_max_delta:
-                        current_max_delta = utility_delta
+                    utility_delta = new_utility - self.constructed_world[x][y].utility
+                    current_max_delta = max(current_max_delta, utility_delta)
+                    current_min_delta = min(current_min_delta, utility_delta)
                     self.update_cell_utility(x, y, new_utility)
                     self.update_cell_policy(x, y, new_policy)
                     self.save_state_utility(x, y)
 
-            stop_condition = current_max_delta < 0.0001 or stop_condition
-            max_delta = max(max_delta, current_max_delta)
+            self.sweeps += 1
+            if current_max_delta == float('-inf'):
+                break
+
+            if self.is_relative:
+                self.normalize_utilities(reference_x, reference_y)
+
+            stop_condition = self.is_converged(current_max_delta, current_min_delta)
+            if not stop_condition and self.sweeps >= self.max_sweeps:
+                print(f"  Info: Value iteration stopped after reaching the limit of {self.max_sweeps} sweeps")
+                break
+
+        if self.is_relative:
+            self.previous_utilities = []
+            self.finish_relative_value_iteration()
 
         world.update_constructed_world(self.constructed_world)
+        return True
+
+    def is_converged(self, max_delta, min_delta):
+        if self.has_terminals and not self.is_relative:
+            # Terminal states are absorbing, their zero delta belongs in the span. Relative
+            # value iteration leaves them out, as the sink behind them may have another gain
+            max_delta = max(max_delta, 0.0)
+            min_delta = min(min_delta, 0.0)
+        span = max_delta - min_delta
+        if self.is_relative:
+            # Relative values only matter up to a constant, so the span seminorm is used.
+            # This bounds the error of the gain estimate, not of the utilities
+            return span < self.tolerance
+        if self.gamma >= 1.0:
+            return max(abs(max_delta), abs(min_delta)) < self.tolerance
+
+        # Bellman error bounds guaranteeing that the greedy policy is epsilon-optimal.
+        # The span bound only holds for synchronous sweeps, in-place sweeps use the max norm
+        max_norm_bound = self.tolerance * (1.0 - self.gamma) / (2.0 * self.gamma)
+        span_bound = self.tolerance * (1.0 - self.gamma) / self.gamma
+        if self.is_synchronous and span < span_bound:
+            return True
+        return max(abs(max_delta), abs(min_delta)) < max_norm_bound
+
+    def get_successors(self, x, y):
+        # States reached with positive probability by any action, terminals lead to the sink only
+        successors = set()
+        for action in self.actions:
+            for dx, dy, _ in self.kernel.get_outcomes(x, y, action):
+                new_x, new_y = self.calculate_new_position(x, y, dx, dy)
+                if self.is_position_out_of_the_world(new_x, new_y, self.width, self.height) or \
+                   self.is_position_forbidden(new_x, new_y, self.constructed_world):
+                    successors.add((x, y))
+                elif not self.is_position_terminal(new_x, new_y, self.constructed_world):
+                    successors.add((new_x, new_y))
+        return successors
+
+    def is_communicating(self, reference_x, reference_y):
+        # Relative value iteration needs one gain for all states, which holds when every
+        # non-terminal state can reach every other one. Walled in states break this
+        states = [(x, y) for x in range(self.width) for y in range(self.height)
+                  if not self.is_position_terminal(x, y, self.constructed_world) and
+                  not self.is_position_forbidden(x, y, self.constructed_world)]
+        if not states:
+            return True
+        successors = {state: self.get_successors(*state) for state in states}
+        predecessors = {state: set() for state in states}
+        for state in states:
+            for successor in successors[state]:
+                predecessors[successor].add(state)
+
+        for graph in (successors, predecessors):
+            reached = {(reference_x, reference_y)}
+            frontier = [(reference_x, reference_y)]
+            while frontier:
+                state = frontier.pop()
+                for neighbour in graph[state] - reached:
+                    reached.add(neighbour)
+                    frontier.append(neighbour)
+            if len(reached) < len(states):
+                return False
+        return True
+
+    def get_reference_position(self):
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.constructed_world[x][y].state == 'S':
+                    return x, y
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.constructed_world[x][y].state not in ('T', 'F'):
+                    return x, y
+        return 0, 0
+
+    def normalize_utilities(self, reference_x, reference_y):
+        # Terminals lead to an absorbing state with zero reward, which is
+        # shifted together with all other states to keep the iteration consistent
+        offset = self.constructed_world[reference_x][reference_y].utility
+        self.gain = offset
+        self.sink_utility -= offset
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.is_position_forbidden(x, y, self.constructed_world):
+                    continue
+                if self.is_position_terminal(x, y, self.constructed_world):
+                    self.update_cell_utility(x, y, self.constructed_world[x][y].reward + self.sink_utility)
+                else:
+                    self.update_cell_utility(x, y, self.constructed_world[x][y].utility - offset)
+
+    def finish_relative_value_iteration(self):
+        if abs(self.gain) < self.tolerance:
+            # Zero gain means the terminals are reached, so utilities are
+            # anchored back to the absorbing state to match plain value iteration
+            for x in range(self.width):
+                for y in range(self.height):
+                    if not self.is_position_forbidden(x, y, self.constructed_world):
+                        self.update_cell_utility(x, y, self.constructed_world[x][y].utility - self.sink_utility)
+            self.sink_utility = 0.0
+            self.gain = 0.0
+        else:
+            print(f"  Info: Optimal policy avoids terminal states, gain per step is {self.gain:.4f}. Utilities are relative to the start state")
+
+    def set_tolerance(self, new_tolerance):
+        if new_tolerance <= 0.0:
+            print("  Error: Tolerance should be greater than 0.0", file=sys.stderr)
+            return False
+        self.tolerance = new_tolerance
+        return True
+
+    def set_max_sweeps(self, new_max_sweeps):
+        if new_max_sweeps < 1:
+            print("  Error: Maximum number of sweeps should be at least 1", file=sys.stderr)
+            return False
+        self.max_sweeps = new_max_sweeps
+        return True
+
+    def set_relative(self, is_relative, gamma):
+        if is_relative and gamma != 1.0:
+            print("  Error: Relative value iteration requires gamma equal to 1.0", file=sys.stderr)
+            return False
+        self.is_relative = is_relative
+        return True
@@ -1,6 +1,7 @@
 import os
 import random
 import sys
+from MotionKernel import MotionKernel
 
 class World:
 
@@ -38,6 +39,10 @@ class World:
         self.terminal_states = []  # Terminal states (X,Y) and their reward
         self.special_states = []  # Special states (X,Y) and their reward
         self.forbidden_states = []  # Forbidden states (X,Y)
+        self.connectivity = 4  # Number of movement directions, 4 or 8
+        self.action_distributions = {}  # Per-action slip distributions over counterclockwise rotations
+        self.regions = []  # Regions (X1,Y1,X2,Y2) with their own uncertainty distribution
+        self.kernel = None  # MotionKernel compiled by construct_world
         self.constructed_world = []
 
     def check_file_validity(self, file_name):
@@ -71,6 +76,18 @@ class World:
                         print(f"  Error: Invalid terminal state definition after T option in file {file_name}", file=sys.stderr)
                         return False
                     has_t = True
+                elif parts[0] == 'K':
+                    if len(parts) != 2 or parts[1] not in ('4', '8'):
+                        print(f"  Error: Invalid connectivity definition after K option in file {file_name}, should be 4 or 8", file=sys.stderr)
+                        return False
+                elif parts[0] == 'D':
+                    if len(parts) not in (6, 10):
+                        print(f"  Error: Invalid slip distribution definition after D option in file {file_name}", file=sys.stderr)
+                        return False
+                elif parts[0] == 'Z':
+                    if len(parts) != 8:
+                        print(f"  Error: Invalid region definition after Z option in file {file_name}", file=sys.stderr)
+                        return False
 
         if not has_w:
             print(f"  Error: Mandatory option W is missing in file {file_name}", file=sys.stderr)
@@ -107,6 +124,29 @@ class World:
             print("  Error: Uncertainty distribution sums to more than 1.0.", file=sys.stderr)
             return False
 
+        # Check if per-action slip distributions match the connectivity and sum to 1.0
+        kernel_actions = MotionKernel.action_directions[self.connectivity]
+        for action, distribution in self.action_distributions.items():
+            if action not in kernel_actions:
+                print(f"  Error: Slip distribution defined for unknown action {action}", file=sys.stderr)
+                return False
+            if len(distribution) != self.connectivity:
+                print(f"  Error: Slip distribution of action {action} should have {self.connectivity} values", file=sys.stderr)
+                return False
+            if any(value < 0.0 or value > 1.0 for value in distribution) or abs(sum(distribution) - 1.0) > 1e-6:
+                print(f"  Error: Slip distribution of action {action} should have values in [0.0, 1.0] summing to 1.0", file=sys.stderr)
+                return False
+
+        # Check if regions are defined within world dimensions and have valid uncertainty
+        for x1, y1, x2, y2, region_p in self.regions:
+            for x_z, y_z in ((x1, y1), (x2, y2)):
+                if x_z <= 0 or x_z > self.width_x or y_z <= 0 or y_z > self.height_y:
+                    print(f"  Error: Region corner ({x_z},{y_z}) is outside world dimensions", file=sys.stderr)
+                    return False
+            if any(value < 0.0 or value > 1.0 for value in region_p) or sum(region_p) > 1.0:
+                print(f"  Error: Invalid uncertainty distribution of region ({x1},{y1})-({x2},{y2})", file=sys.stderr)
+                return False
+
         # Check if gamma is in range (0.0, 1.0]
         if self.gamma <= 0.0 or self.gamma > 1.0:
             print("  Error: Gamma should be in the range (0.0, 1.0]", file=sys.stderr)
@@ -164,6 +204,13 @@ class World:
                 elif parts[0] == 'F':
                     x, y = int(parts[1]), int(parts[2])
                     self.forbidden_states.append((x, y))
+                elif parts[0] == 'K':
+                    self.connectivity = int(parts[1])
+                elif parts[0] == 'D':
+                    self.action_distributions[parts[1]] = [float(value) for value in parts[2:]]
+                elif parts[0] == 'Z':
+                    x1, y1, x2, y2 = int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4])
+                    self.regions.append((x1, y1, x2, y2, [float(parts[5]), float(parts[6]), float(parts[7])]))
 
         if not is_start_in_file and not is_q_learning:
             self.start_x = 1
@@ -200,7 +247,12 @@ class World:
         print(f"  Height Y: {self.height_y}")
         print(f"  Start X: {self.start_x}")
         print(f"  Start Y: {self.start_y}")
-        print(f"  Uncertainty Distribution P: {self.p[0]}(^), {self.p[1]}(<), {self.p[2]}(>)")        
+        print(f"  Uncertainty Distribution P: {self.p[0]}(^), {self.p[1]}(<), {self.p[2]}(>)")
+        print(f"  Connectivity K: {self.connectivity}")
+        for action, distribution in self.action_distributions.items():
+            print(f"  (D) Slip Distribution of {action}: {' '.join(str(value) for value in distribution)}")
+        for x1, y1, x2, y2, region_p in self.regions:
+            print(f"  (Z) Region ({x1},{y1})-({x2},{y2}): {region_p[0]}(^), {region_p[1]}(<), {region_p[2]}(>)")
         print(f"  Reward: {self.reward}")
         print(f"  Discounting Parameter Gamma: {self.gamma}")
         print(f"  Exploration Parameter Epsilon: {self.epsilon}")
@@ -253,7 +305,7 @@ class World:
         height = len(self.constructed_world[0])
         width = len(self.constructed_world)
 
-        directions = ['^', '<', '>', 'v']
+        directions = self.kernel.actions
 
         # Determine the maximum width needed for each cell, considering Q-values with 4 decimal places
         max_chars = max(len(f"{cell.q[dir]:.4f}") for row in self.constructed_world for cell in row for dir in directions) + 2
@@ -276,11 +328,16 @@ class World:
 
 
     def construct_world(self):
+        self.kernel = MotionKernel.compile(self.connectivity, self.p, self.action_distributions, self.regions,
+                                           self.width_x, self.height_y)
+
         world = [[self.Cell() for _ in range(self.height_y)] for _ in range(self.width_x)]
 
         for x in range(1, self.width_x + 1):
             for y in range(1, self.height_y + 1):
                 cell = self.Cell()
+                cell.q = {action: 0.0 for action in self.kernel.actions}
+                cell.n = {action: 0 for action in self.kernel.actions}
 
                 cell.reward = self.reward
 
@@ -334,6 +391,9 @@ class World:
     def get_epsilon(self):
         return(self.epsilon)
     
+    def get_kernel(self):
+        return(self.kernel)
+
     def get_constructed_world(self):
         return(self.constructed_world)
     
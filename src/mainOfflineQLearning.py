@@ -0,0 +1,65 @@
+import argparse
+from OfflineQLearning import OfflineQLearning
+from Plotter import Plotter
+from World import World
+
+def main():
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Run offline Q-Learning on logged trajectories.')
+    parser.add_argument('--data', required=True, help='Path to the data file')
+    parser.add_argument('--logs', required=True, nargs='+', help='Paths to the trajectory logs')
+    parser.add_argument('--gamma', type=float, default=1, help='Discount factor gamma')
+    parser.add_argument('--alpha', type=float, default=None, help='Constant learning rate (1/n over the visits of the current pass by default)')
+    parser.add_argument('--passes', type=int, default=1, help='Number of passes over the logs')
+    parser.add_argument('--batch-size', type=int, default=256, help='Number of transitions in a mini-batch')
+    parser.add_argument('--seed', type=int, default=None, help='Seed used to shuffle the transitions')
+    parser.add_argument('--plot', action='store_true', help='Whether to plot the results')
+
+    args = parser.parse_args()
+
+    # Initialize World and offline q_learning objects
+    world = World()
+    offline_q_learning = OfflineQLearning()
+
+    # Load world parameters from file
+    if not world.load_world_parameters_from_file(args.data, True):
+        print("Error: Failed to load world parameters from file.")
+        return 1
+
+    # Set gamma if provided
+    if args.gamma is not None:
+        if not world.set_gamma(args.gamma):
+            print("Error: Failed to set gamma.")
+            return 1
+
+    # Set replay parameters
+    if not offline_q_learning.set_alpha(args.alpha) or \
+       not offline_q_learning.set_passes(args.passes) or \
+       not offline_q_learning.set_batch_size(args.batch_size):
+        print("Error: Failed to set offline Q-Learning parameters.")
+        return 1
+    offline_q_learning.set_seed(args.seed)
+
+    # Print and construct world
+    world.print_world_parameters()
+    world.construct_world()
+
+    # Replay trajectory logs
+    try:
+        if not offline_q_learning.start(world, args.logs):
+            print("Error: Failed to replay trajectory logs.")
+            return 1
+    except (OSError, ValueError) as error:
+        print(f"Error: Failed to read trajectory logs. {error}")
+        return 1
+
+    # Display world and Q-values
+    world.display_world()
+    world.display_q_values()
+
+    # Plot if requested
+    if args.plot:
+        Plotter.plot(offline_q_learning.saved_state_utilities)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+from MotionKernel import MotionKernel
+from OutOfCoreValueIteration import OutOfCoreValueIteration, write_grid_arrays
+from World import World
+
+def main():
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Run Value Iteration Algorithm on memory-mapped grids.')
+    parser.add_argument('--grid-dir', required=True, help='Directory with rewards.npy and states.npy, results are written there')
+    parser.add_argument('--from-data', default=None, help='Export the grids of the given data file to the grid directory first')
+    parser.add_argument('--p', type=float, nargs=3, default=None, help='Uncertainty distribution p1 p2 p3 (0.8 0.1 0.1 by default)')
+    parser.add_argument('--connectivity', type=int, choices=[4, 8], default=None, help='Number of movement directions (4 by default)')
+    parser.add_argument('--gamma', type=float, default=None, help='Discount factor gamma (1 by default)')
+    parser.add_argument('--tolerance', type=float, default=None, help='Allowed loss of the resulting policy epsilon (0.0001 by default)')
+    parser.add_argument('--max-sweeps', type=int, default=100000, help='Maximum number of value iteration sweeps')
+    parser.add_argument('--band-size', type=int, default=None, help='Number of grid rows updated together (64 by default)')
+    parser.add_argument('--checkpoint-interval', type=int, default=16, help='Number of bands between progress checkpoints')
+    parser.add_argument('--resume', action='store_true', help='Continue from the last checkpoint in the grid directory with the settings stored there')
+
+    args = parser.parse_args()
+
+    value_iteration_algorithm = OutOfCoreValueIteration()
+    if not value_iteration_algorithm.set_max_sweeps(args.max_sweeps) or \
+       not value_iteration_algorithm.set_checkpoint_interval(args.checkpoint_interval):
+        print("Error: Failed to set value iteration parameters.")
+        return 1
+
+    # A resumed run has to solve the same model, so its settings come from the checkpoint
+    if args.resume:
+        if args.from_data is not None or args.p is not None or args.connectivity is not None or \
+           args.gamma is not None or args.tolerance is not None or args.band_size is not None:
+            print("Error: Resumed runs use the model settings stored in the checkpoint, only --max-sweeps and --checkpoint-interval can be given.")
+            return 1
+        try:
+            if not value_iteration_algorithm.resume(args.grid_dir):
+                print("Error: Out-of-core value iteration failed.")
+                return 1
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Error: Failed to access grid files. {error}")
+            return 1
+        print_results(args.grid_dir, value_iteration_algorithm)
+        return 0
+
+    p = [0.8, 0.1, 0.1] if args.p is None else args.p
+    connectivity = 4 if args.connectivity is None else args.connectivity
+    gamma = 1.0 if args.gamma is None else args.gamma
+    action_distributions = {}
+
+    # Export the grids of a data file, its motion model replaces the command line one
+    if args.from_data is not None:
+        world = World()
+        if not world.load_world_parameters_from_file(args.from_data, False):
+            print("Error: Failed to load world parameters from file.")
+            return 1
+        if world.regions:
+            print("Error: Region overrides aren't supported by out-of-core value iteration.")
+            return 1
+        world.construct_world()
+        write_grid_arrays(world, args.grid_dir)
+        p = world.get_p()
+        connectivity = world.connectivity
+        action_distributions = world.action_distributions
+
+    if any(value < 0.0 or value > 1.0 for value in p) or sum(p) > 1.0:
+        print("Error: Invalid uncertainty distribution.")
+        return 1
+    if gamma <= 0.0 or gamma > 1.0:
+        print("Error: Gamma should be in the range (0.0, 1.0].")
+        return 1
+
+    kernel = MotionKernel.compile(connectivity, p, action_distributions, [], 0, 0)
+
+    # Set stopping rule and streaming parameters
+    if (args.tolerance is not None and not value_iteration_algorithm.set_tolerance(args.tolerance)) or \
+       (args.band_size is not None and not value_iteration_algorithm.set_band_size(args.band_size)):
+        print("Error: Failed to set value iteration parameters.")
+        return 1
+
+    # Run Value Iteration Algorithm
+    try:
+        if not value_iteration_algorithm.start(args.grid_dir, gamma, kernel):
+            print("Error: Out-of-core value iteration failed.")
+            return 1
+    except (OSError, ValueError) as error:
+        print(f"Error: Failed to access grid files. {error}")
+        return 1
+
+    print_results(args.grid_dir, value_iteration_algorithm)
+    return 0
+
+def print_results(grid_dir, value_iteration_algorithm):
+    print(f"  Info: Utilities and policy written to {grid_dir} after {value_iteration_algorithm.sweeps} sweeps")
+    print(f"  Info: Policy values index the actions {' '.join(value_iteration_algorithm.actions)}, -1 marks terminal and forbidden states")
+
+if __name__ == "__main__":
+    main()
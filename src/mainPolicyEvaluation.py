@@ -0,0 +1,55 @@
+import argparse
+import copy
+from ExactPolicyEvaluator import ExactPolicyEvaluator, load_policy_file
+from ValueIterationAlgorithm import ValueIterationAlgorithm
+from World import World
+
+def main():
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Evaluate a policy exactly against the optimal policy.')
+    parser.add_argument('--data', required=True, help='Path to the data file')
+    parser.add_argument('--policy', required=True, help='Path to the policy file')
+    parser.add_argument('--gamma', type=float, default=1, help='Discount factor gamma')
+
+    args = parser.parse_args()
+
+    # Initialize World object
+    world = World()
+
+    # Load world parameters from file
+    if not world.load_world_parameters_from_file(args.data, False):
+        print("Error: Failed to load world parameters from file.")
+        return 1
+
+    # Set gamma if provided
+    if args.gamma is not None:
+        if not world.set_gamma(args.gamma):
+            print("Error: Failed to set gamma.")
+            return 1
+
+    # Print and construct world
+    world.print_world_parameters()
+    world.construct_world()
+
+    # Solve the world for the optimal policy
+    optimal_world = copy.deepcopy(world)
+    ValueIterationAlgorithm().start(optimal_world)
+
+    # Load the evaluated policy
+    if not load_policy_file(args.policy, world.get_constructed_world(), world.get_kernel().actions):
+        print("Error: Failed to load policy from file.")
+        return 1
+
+    # Evaluate the policy exactly
+    evaluator = ExactPolicyEvaluator(world)
+    if not evaluator.set_optimal_policy(optimal_world.get_constructed_world()):
+        print("Error: Failed to evaluate the optimal policy.")
+        return 1
+    report = evaluator.evaluate(world.get_constructed_world(), world.get_coordinates_of_state("S"))
+    if report is None:
+        print("Error: Failed to evaluate the policy.")
+        return 1
+    ExactPolicyEvaluator.display_report(report, world.get_constructed_world())
+
+if __name__ == "__main__":
+    main()
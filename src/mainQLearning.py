@@ -1,7 +1,14 @@
 import argparse
+import copy
 from QLearning import QLearning
 from Plotter import Plotter
 from World import World
+from ValueIterationAlgorithm import ValueIterationAlgorithm
+from PolicyEvaluator import PolicyEvaluator
+from LiveMonitor import LiveMonitor
+from TrajectoryLog import TrajectoryLogger
+from ExactPolicyEvaluator import ExactPolicyEvaluator, save_policy_file
+from ExplorationStrategies import Schedule, EpsilonGreedy, Softmax, UCB, LearningRate
 
 def main():
     # Set up argument parser
@@ -10,6 +17,28 @@ def main():
     parser.add_argument('--gamma', type=float, default=1, help='Discount factor gamma')
     parser.add_argument('--epsilon', type=float, default=0.1, help='Exploration rate epsilon')
     parser.add_argument('--iteration', type=int, default=10000, help='Number of iterations for Q-Learning')
+    parser.add_argument('--mode', choices=['q-learning', 'q-lambda', 'n-step'], default='q-learning', help='Learning mode: one-step Q-learning, Watkins Q(lambda) or n-step Q-learning')
+    parser.add_argument('--lambda', dest='lambda_', type=float, default=0.9, help='Trace decay lambda used by q-lambda mode')
+    parser.add_argument('--n-step', type=int, default=5, help='Number of steps in the return used by n-step mode')
+    parser.add_argument('--exploration', choices=['epsilon', 'softmax', 'ucb'], default='epsilon', help='Exploration strategy: epsilon-greedy, softmax (Boltzmann) or UCB on visit counts')
+    parser.add_argument('--schedule', choices=['constant', 'linear', 'exponential'], default='constant', help='Decay schedule of epsilon or softmax temperature over the episodes')
+    parser.add_argument('--min-epsilon', type=float, default=0.01, help='Epsilon reached at the last episode by a decaying schedule')
+    parser.add_argument('--temperature', type=float, default=1.0, help='Initial softmax temperature')
+    parser.add_argument('--min-temperature', type=float, default=0.05, help='Softmax temperature reached at the last episode by a decaying schedule')
+    parser.add_argument('--ucb-c', type=float, default=1.0, help='Weight of the UCB exploration bonus')
+    parser.add_argument('--learning-rate', choices=['inverse-count', 'constant', 'polynomial'], default='inverse-count', help='Learning rate: 1/n, constant alpha or 1/n^omega')
+    parser.add_argument('--alpha', type=float, default=0.1, help='Learning rate used by the constant schedule')
+    parser.add_argument('--omega', type=float, default=0.8, help='Exponent used by the polynomial learning rate, in the range (0.5, 1]')
+    parser.add_argument('--start-mode', choices=['start', 'uniform', 'coverage'], default='start', help='Where episodes begin: the S state, uniformly random states or rarely visited states')
+    parser.add_argument('--evaluate', type=int, default=0, help='Number of Monte Carlo rollouts used to evaluate the learned policy (0 disables evaluation)')
+    parser.add_argument('--evaluate-every', type=int, default=0, help='Evaluate the policy every given number of episodes')
+    parser.add_argument('--evaluate-all-states', action='store_true', help='Start evaluation rollouts from every state instead of the start state')
+    parser.add_argument('--exact-evaluation', action='store_true', help='Evaluate the learned policy exactly and show its regret map')
+    parser.add_argument('--save-policy', default=None, help='Write the learned policy to the given file')
+    parser.add_argument('--live', choices=['terminal', 'chart'], default=None, help='Show live training progress in the terminal or in a chart window')
+    parser.add_argument('--live-fps', type=float, default=10, help='Maximum number of live view redraws per second')
+    parser.add_argument('--live-states', nargs='*', default=None, help='States shown in the live view as X,Y pairs (start state by default)')
+    parser.add_argument('--log-trajectories', default=None, help='Append every transition to the given binary trajectory log')
     parser.add_argument('--plot', action='store_true', help='Whether to plot the results')
 
     args = parser.parse_args()
@@ -43,17 +72,131 @@ def main():
         q_learning.set_iteration(args.iteration)
         q_learning.is_iteration_defined_by_user = True
 
+    # Set learning mode and its parameters
+    if not q_learning.set_mode(args.mode) or \
+       not q_learning.set_lambda(args.lambda_) or \
+       not q_learning.set_n_step(args.n_step):
+        print("Error: Failed to set learning mode.")
+        return 1
+
+    # Set exploration strategy and learning rate
+    if args.exploration == 'epsilon' and args.schedule == 'exponential' and \
+       (world.get_epsilon() <= 0.0 or args.min_epsilon <= 0.0):
+        print("Error: Exponential schedule requires epsilon values greater than 0.")
+        return 1
+    if args.exploration == 'softmax' and (args.temperature <= 0.0 or args.min_temperature <= 0.0):
+        print("Error: Softmax temperature should be greater than 0.")
+        return 1
+    if args.exploration == 'ucb' and args.schedule != 'constant':
+        print("Error: UCB exploration doesn't use a schedule.")
+        return 1
+    if args.exploration == 'softmax':
+        q_learning.set_exploration(Softmax(Schedule(args.schedule, args.temperature, args.min_temperature)))
+    elif args.exploration == 'ucb':
+        q_learning.set_exploration(UCB(args.ucb_c))
+    elif args.schedule != 'constant':
+        q_learning.set_exploration(EpsilonGreedy(Schedule(args.schedule, world.get_epsilon(), args.min_epsilon)))
+
+    if args.learning_rate == 'constant' and (args.alpha <= 0.0 or args.alpha > 1.0):
+        print("Error: Learning rate should be in the range (0.0, 1.0].")
+        return 1
+    if args.learning_rate == 'polynomial' and (args.omega <= 0.5 or args.omega > 1.0):
+        print("Error: Learning rate exponent omega should be in the range (0.5, 1.0].")
+        return 1
+    q_learning.set_learning_rate(LearningRate(args.learning_rate, args.alpha, args.omega))
+
+    # Set episode start scheduling
+    if not q_learning.set_start_mode(args.start_mode):
+        print("Error: Failed to set episode start mode.")
+        return 1
+
     # Print and construct world
     world.print_world_parameters()
     world.construct_world()
 
+    # Prepare Monte Carlo evaluation against the value iteration solution
+    if args.evaluate <= 0 and (args.evaluate_every > 0 or args.evaluate_all_states):
+        print("Error: --evaluate-every and --evaluate-all-states require --evaluate.")
+        return 1
+    evaluator = None
+    optimal_world = None
+    if args.evaluate > 0 or args.exact_evaluation:
+        optimal_world = copy.deepcopy(world)
+        ValueIterationAlgorithm().start(optimal_world)
+    if args.evaluate > 0:
+        evaluator = PolicyEvaluator(world, episodes=args.evaluate)
+        evaluator.set_optimal_utilities(optimal_world.get_constructed_world())
+        if args.evaluate_every > 0 and not q_learning.set_evaluator(evaluator, args.evaluate_every, args.evaluate_all_states):
+            print("Error: Failed to set policy evaluation.")
+            return 1
+
+    # Start live monitoring
+    monitor = None
+    if args.live is not None:
+        if args.live_fps <= 0:
+            print("Error: Live view frame rate should be greater than 0.")
+            return 1
+        if args.live_states:
+            try:
+                monitored_states = [tuple(int(value) - 1 for value in state.split(',')) for state in args.live_states]
+                if any(len(state) != 2 for state in monitored_states):
+                    raise ValueError
+            except ValueError:
+                print("Error: Live view states should be given as X,Y pairs.")
+                return 1
+        else:
+            monitored_states = [world.get_coordinates_of_state("S")]
+        if any(QLearning.is_position_out_of_the_world(x, y, world.width_x, world.height_y) for x, y in monitored_states):
+            print("Error: Live view state is outside world dimensions.")
+            return 1
+        monitor = LiveMonitor([f"({x + 1},{y + 1})" for x, y in monitored_states], args.live, args.live_fps)
+        q_learning.set_monitor(monitor, monitored_states)
+        monitor.start()
+
+    # Open trajectory log
+    trajectory_logger = None
+    if args.log_trajectories is not None:
+        try:
+            trajectory_logger = TrajectoryLogger(args.log_trajectories, world.width_x, world.height_y,
+                                                 len(world.get_kernel().actions))
+        except (OSError, ValueError) as error:
+            print(f"Error: Failed to open trajectory log. {error}")
+            return 1
+        q_learning.set_trajectory_logger(trajectory_logger)
+
     # Run Q-Learning
     q_learning.start(world)
 
+    if trajectory_logger is not None:
+        trajectory_logger.close()
+        print(f"  Info: {trajectory_logger.logged} transitions logged to {args.log_trajectories}")
+
+    if monitor is not None:
+        monitor.stop()
+
+    for episode, report in q_learning.evaluation_reports:
+        PolicyEvaluator.display_report(report, f"Episode {episode}")
+
     # Display world and Q-values
     world.display_world()
     world.display_q_values()
 
+    # Evaluate the final policy
+    if evaluator is not None:
+        start = world.get_coordinates_of_state("S")
+        report = evaluator.evaluate(world.get_constructed_world(), start, args.evaluate_all_states)
+        PolicyEvaluator.display_report(report)
+
+    if args.exact_evaluation:
+        exact_evaluator = ExactPolicyEvaluator(world)
+        if exact_evaluator.set_optimal_policy(optimal_world.get_constructed_world()):
+            report = exact_evaluator.evaluate(world.get_constructed_world(), world.get_coordinates_of_state("S"))
+            if report is not None:
+                ExactPolicyEvaluator.display_report(report, world.get_constructed_world())
+
+    if args.save_policy is not None:
+        save_policy_file(args.save_policy, world.get_constructed_world())
+
     # Plot if requested
     if args.plot:
         Plotter.plot(q_learning.saved_state_utilities)
@@ -1,7 +1,9 @@
 import argparse
 from ValueIterationAlgorithm import ValueIterationAlgorithm
+from ParallelValueIteration import ParallelValueIteration
 from Plotter import Plotter
 from World import World
+from ExactPolicyEvaluator import save_policy_file
 
 
 
@@ -10,6 +12,12 @@ def main():
     parser = argparse.ArgumentParser(description='Run Value Iteration Algorithm.')
     parser.add_argument('--data', required=True, help='Path to the data file')
     parser.add_argument('--gamma', type=float, default=1, help='Discount factor gamma')
+    parser.add_argument('--tolerance', type=float, default=0.0001, help='Allowed loss of the resulting policy epsilon')
+    parser.add_argument('--max-sweeps', type=int, default=100000, help='Maximum number of value iteration sweeps')
+    parser.add_argument('--relative', action='store_true', help='Use relative value iteration (requires gamma equal to 1), the tolerance then bounds the gain estimate rather than the utilities')
+    parser.add_argument('--tile-size', type=int, default=0, help='Run tile-parallel value iteration with tiles of the given size (0 disables it)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker threads used by tile-parallel value iteration')
+    parser.add_argument('--save-policy', default=None, help='Write the resulting policy to the given file')
     parser.add_argument('--plot', action='store_true', help='Whether to plot the results')
 
     args = parser.parse_args()
@@ -21,7 +29,25 @@ def main():
 
     # Initialize World object
     world = World()
-    value_iteration_algorithm = ValueIterationAlgorithm()
+    if args.tile_size > 0:
+        value_iteration_algorithm = ParallelValueIteration()
+        if not value_iteration_algorithm.set_tile_size(args.tile_size):
+            print("Error: Failed to set tile size.")
+            return 1
+        if args.workers is not None and not value_iteration_algorithm.set_workers(args.workers):
+            print("Error: Failed to set number of workers.")
+            return 1
+        if args.relative:
+            print("Error: Relative value iteration isn't supported by tile-parallel value iteration.")
+            return 1
+        if args.plot:
+            print("Error: Plotting isn't supported by tile-parallel value iteration, it doesn't record utilities per sweep.")
+            return 1
+    else:
+        if args.workers is not None:
+            print("Error: Number of workers requires tile-parallel value iteration (--tile-size).")
+            return 1
+        value_iteration_algorithm = ValueIterationAlgorithm()
 
     # Load world parameters from file
     if not world.load_world_parameters_from_file(args.data, False):
@@ -34,16 +60,28 @@ def main():
             print("Error: Failed to set gamma.")
             return 1
 
+    # Set stopping rule and iteration mode
+    if not value_iteration_algorithm.set_tolerance(args.tolerance) or \
+       not value_iteration_algorithm.set_max_sweeps(args.max_sweeps) or \
+       not value_iteration_algorithm.set_relative(args.relative, world.get_gamma()):
+        print("Error: Failed to set value iteration parameters.")
+        return 1
+
     # Print and construct world
     world.print_world_parameters()
     world.construct_world()
 
     # Run Value Iteration Algorithm
-    value_iteration_algorithm.start(world)
+    if not value_iteration_algorithm.start(world):
+        print("Error: Value iteration failed.")
+        return 1
 
     # Display world
     world.display_world()
 
+    if args.save_policy is not None:
+        save_policy_file(args.save_policy, world.get_constructed_world())
+
     # Plot if requested
     if args.plot:
         Plotter.plot(value_iteration_algorithm.saved_state_utilities)